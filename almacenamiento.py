@@ -0,0 +1,1003 @@
+"""Capa de acceso a datos del Tutor EXANI-I.
+
+Las funciones de datos de `app.py` hablan con un `Almacen`. Hay dos:
+`AlmacenSheets` (Google Sheets, el de siempre) y `AlmacenSQLite` (archivo local
+en modo WAL, para escuelas con muchos alumnos, pruebas y mediciones sin red).
+"""
+import atexit
+import json
+import random
+import sqlite3
+import threading
+import time
+
+import gspread
+import requests
+from gspread.utils import numericise_all, rowcol_to_a1
+
+# ==========================================
+# 1. CONEXIÓN COMPARTIDA A GOOGLE SHEETS
+# ==========================================
+# Los tokens OAuth de una cuenta de servicio duran 1 hora: renovamos antes de que caduquen.
+VIDA_TOKEN_SEGUNDOS = 50 * 60
+
+# Cuota de la API de Sheets por usuario (la cuenta de servicio) y por minuto.
+CUOTA_LECTURAS_POR_MINUTO = 60
+CUOTA_ESCRITURAS_POR_MINUTO = 60
+# Peticiones que se pueden hacer de golpe antes de que el limitador empiece a espaciar.
+RAFAGA_PETICIONES = 10
+# Cuánto puede esperar una petición por un turno antes de darse por vencida.
+ESPERA_MAXIMA_TURNO_SEGUNDOS = 5
+
+# Reintentos con espera exponencial y jitter ante 429/5xx o fallas de red.
+CODIGOS_REINTENTABLES = {429, 500, 502, 503, 504}
+REINTENTOS_SHEETS = 3
+ESPERA_BASE_SEGUNDOS = 0.5
+ESPERA_TOPE_SEGUNDOS = 8
+# Tras agotar los reintentos, Sheets se da por no disponible durante una ventana de cuota.
+DURACION_MODO_DEGRADADO_SEGUNDOS = 60
+
+
+class ServicioNoDisponible(Exception):
+    """Google Sheets no respondió (cuota agotada, error del servidor o modo degradado)."""
+
+
+class LimitadorCuota:
+    """Cubeta de fichas compartida por todos los hilos del proceso.
+
+    Con una ráfaga `rafaga` y un relleno de (cuota - rafaga) / 60 fichas por
+    segundo, ninguna ventana de 60 s supera la cuota por minuto.
+    """
+
+    def __init__(self, cuota_por_minuto, rafaga=RAFAGA_PETICIONES):
+        self._capacidad = rafaga
+        self._relleno = max(cuota_por_minuto - rafaga, 1) / 60.0
+        self._fichas = float(rafaga)
+        self._actualizado_en = time.monotonic()
+        self._lock = threading.Lock()
+
+    def adquirir(self, espera_maxima=ESPERA_MAXIMA_TURNO_SEGUNDOS):
+        """Toma una ficha, esperando si hace falta; devuelve False si la espera excede el máximo."""
+        with self._lock:
+            ahora = time.monotonic()
+            self._fichas = min(self._capacidad, self._fichas + (ahora - self._actualizado_en) * self._relleno)
+            self._actualizado_en = ahora
+            espera = 0.0 if self._fichas >= 1 else (1 - self._fichas) / self._relleno
+            if espera > espera_maxima:
+                return False
+            # La ficha queda apartada aunque todavía no se haya rellenado: así los
+            # hilos que llegan después esperan su propio turno.
+            self._fichas -= 1
+        if espera:
+            time.sleep(espera)
+        return True
+
+
+def codigo_http(error):
+    """Código HTTP de un error de gspread, o None si no viene de la API."""
+    codigo = getattr(error, "code", None)
+    if codigo is None and getattr(error, "response", None) is not None:
+        codigo = getattr(error.response, "status_code", None)
+    return codigo if isinstance(codigo, int) else None
+
+
+class ConexionSheets:
+    """Cliente de gspread único por proceso, con caché del libro y de sus hojas.
+
+    Todas las sesiones de Streamlit comparten esta instancia, por eso cada acceso
+    al estado interno pasa por un candado. Las llamadas de datos pasan por
+    `ejecutar`, que respeta la cuota y reintenta los errores transitorios.
+    `autorizar` (por omisión gspread.authorize) recibe las credenciales y
+    devuelve el cliente; la prueba de carga lo cambia por un Sheets simulado.
+    """
+
+    def __init__(self, crear_credenciales, nombre_libro, vida_token=VIDA_TOKEN_SEGUNDOS,
+                 cuota_lecturas=CUOTA_LECTURAS_POR_MINUTO, cuota_escrituras=CUOTA_ESCRITURAS_POR_MINUTO,
+                 reintentos=REINTENTOS_SHEETS, autorizar=None):
+        self._crear_credenciales = crear_credenciales
+        self._autorizar_cliente = autorizar
+        self._nombre_libro = nombre_libro
+        self._vida_token = vida_token
+        self._reintentos = reintentos
+        self.limitador_lecturas = LimitadorCuota(cuota_lecturas)
+        self.limitador_escrituras = LimitadorCuota(cuota_escrituras)
+        self._degradado_hasta = 0.0
+        self._lock = threading.RLock()
+        self._libro = None
+        self._clave_libro = None
+        self._hojas = {}
+        self._autorizado_en = 0.0
+
+    def _autorizar(self):
+        client = (self._autorizar_cliente or gspread.authorize)(self._crear_credenciales())
+        if self._clave_libro is None:
+            # Abrir por nombre implica una búsqueda en Drive: solo la hacemos una vez.
+            libro = client.open(self._nombre_libro)
+            self._clave_libro = libro.id
+        else:
+            libro = client.open_by_key(self._clave_libro)
+        self._libro = libro
+        # Una sola petición de metadatos trae todas las hojas del libro.
+        self._hojas = {ws.title: ws for ws in libro.worksheets()}
+        self._autorizado_en = time.monotonic()
+
+    def libro(self):
+        """Devuelve el libro abierto, renovando el token si está por caducar.
+
+        Abrir el libro y leer sus hojas son llamadas a la API: pasan por `ejecutar`
+        (cuota, reintentos y modo degradado). Si la renovación falla pero ya hay un
+        libro abierto, se sigue usando ese y se vuelve a intentar más tarde.
+        """
+        with self._lock:
+            if self._libro is None or time.monotonic() - self._autorizado_en > self._vida_token:
+                anterior = (self._libro, self._hojas)
+                try:
+                    self.ejecutar(self._autorizar)
+                except ServicioNoDisponible:
+                    if anterior[0] is None:
+                        raise
+                    self._libro, self._hojas = anterior
+            return self._libro
+
+    def hoja(self, nombre):
+        """Devuelve la hoja pedida sin volver a consultar los metadatos del libro."""
+        with self._lock:
+            libro = self.libro()
+            if nombre not in self._hojas:
+                self._hojas[nombre] = libro.worksheet(nombre)
+            return self._hojas[nombre]
+
+    def renovar(self):
+        """Descarta el cliente actual; el siguiente acceso vuelve a autorizar."""
+        with self._lock:
+            self._libro = None
+            self._hojas = {}
+
+    def degradado(self):
+        """True mientras Sheets se considera no disponible (se sirven copias locales)."""
+        return time.monotonic() < self._degradado_hasta
+
+    def ejecutar(self, operacion, escritura=False):
+        """Ejecuta `operacion()` contra Sheets respetando la cuota.
+
+        Reintenta 429/5xx y fallas de red con espera exponencial y jitter. Si se
+        agotan los reintentos, entra en modo degradado y lanza ServicioNoDisponible;
+        mientras dure ese modo, las llamadas fallan de inmediato sin gastar cuota.
+        """
+        if self.degradado():
+            raise ServicioNoDisponible("Google Sheets está saturado; se usan los datos guardados.")
+        limitador = self.limitador_escrituras if escritura else self.limitador_lecturas
+        for intento in range(self._reintentos + 1):
+            if not limitador.adquirir():
+                raise ServicioNoDisponible("Demasiadas peticiones a Google Sheets en este minuto.")
+            try:
+                return operacion()
+            except (gspread.exceptions.APIError, requests.exceptions.RequestException) as e:
+                codigo = codigo_http(e)
+                if codigo == 401 and intento == 0:
+                    # Token revocado o vencido antes de tiempo: autorizamos de nuevo.
+                    self.renovar()
+                    continue
+                if codigo is not None and codigo not in CODIGOS_REINTENTABLES:
+                    raise
+                if intento == self._reintentos:
+                    self._degradado_hasta = time.monotonic() + DURACION_MODO_DEGRADADO_SEGUNDOS
+                    raise ServicioNoDisponible(str(e)) from e
+                espera = min(ESPERA_TOPE_SEGUNDOS, ESPERA_BASE_SEGUNDOS * 2 ** intento)
+                time.sleep(random.uniform(0, espera))
+
+
+# ==========================================
+# 2. CACHÉ EN MEMORIA DE LA HOJA 'USUARIOS'
+# ==========================================
+COLUMNAS_USUARIOS = ['id', 'nombre_completo', 'escuela', 'grupo', 'fecha_registro', 'password']
+
+# Tiempo que se confía en la copia local antes de volver a descargar la hoja.
+TTL_USUARIOS_SEGUNDOS = 300
+# Si un nombre no aparece, recargamos como máximo con esta frecuencia
+# (cubre registros hechos desde otra instancia del servidor).
+RECARGA_MINIMA_SEGUNDOS = 15
+
+
+def normalizar_nombre(nombre):
+    """Forma canónica del nombre con la que se guarda y se busca a un alumno."""
+    return str(nombre).strip().upper()
+
+
+class CacheUsuarios:
+    """Copia de la hoja 'Usuarios' con índice hash por nombre_completo.
+
+    `cargar` es una función que devuelve los registros de la hoja
+    (lo que entrega `get_all_records()`). `pendientes`, si se da, devuelve los
+    registros que todavía esperan en el spool y se suman al índice.
+    Si la hoja no responde se sigue sirviendo la última copia buena.
+    """
+
+    def __init__(self, cargar, ttl=TTL_USUARIOS_SEGUNDOS, recarga_minima=RECARGA_MINIMA_SEGUNDOS,
+                 pendientes=None):
+        self._cargar = cargar
+        self._pendientes = pendientes
+        self._ttl = ttl
+        self._recarga_minima = recarga_minima
+        self._lock = threading.RLock()
+        self._por_nombre = {}
+        self._max_id = 0
+        # id -> número de fila en la hoja, y nombres de columna en el orden de la hoja
+        self._filas = {}
+        self._columnas = []
+        self._cargado_en = None
+
+    def _edad(self):
+        return float('inf') if self._cargado_en is None else time.monotonic() - self._cargado_en
+
+    def _refrescar(self):
+        try:
+            registros = self._cargar()
+        except ServicioNoDisponible:
+            if self._cargado_en is None:
+                raise
+            # Modo degradado: conservamos la copia y volvemos a intentar más tarde.
+            self._cargado_en = time.monotonic() - self._ttl + self._recarga_minima
+            return
+        # La fila 1 es el encabezado; los registros del spool todavía no tienen fila.
+        filas = {
+            int(registro['id']): numero
+            for numero, registro in enumerate(registros, start=2) if str(registro.get('id', '')).strip()
+        }
+        columnas = list(registros[0]) if registros else []
+        if self._pendientes:
+            registros = list(registros) + list(self._pendientes())
+        por_nombre = {}
+        max_id = 0
+        for registro in registros:
+            por_nombre[normalizar_nombre(registro['nombre_completo'])] = registro
+            if str(registro.get('id', '')).strip():
+                max_id = max(max_id, int(registro['id']))
+        self._por_nombre = por_nombre
+        self._max_id = max_id
+        self._filas = filas
+        self._columnas = columnas
+        self._cargado_en = time.monotonic()
+
+    def _asegurar_vigente(self):
+        if self._edad() > self._ttl:
+            self._refrescar()
+
+    def buscar(self, nombre, recargar_si_falta=True):
+        """Devuelve el registro del alumno o None, en O(1)."""
+        nombre = normalizar_nombre(nombre)
+        with self._lock:
+            self._asegurar_vigente()
+            registro = self._por_nombre.get(nombre)
+            if registro is None and recargar_si_falta and self._edad() > self._recarga_minima:
+                self._refrescar()
+                registro = self._por_nombre.get(nombre)
+            return registro
+
+    def max_id(self):
+        """Mayor id registrado hasta ahora (0 si la hoja está vacía)."""
+        with self._lock:
+            self._asegurar_vigente()
+            return self._max_id
+
+    def registros(self):
+        """Lista de todos los usuarios en memoria."""
+        with self._lock:
+            self._asegurar_vigente()
+            return list(self._por_nombre.values())
+
+    def fila(self, usuario_id):
+        """Número de fila del alumno en la hoja según la última descarga (None si no está)."""
+        with self._lock:
+            return self._filas.get(int(usuario_id))
+
+    def columna(self, nombre):
+        """Número de columna (desde 1) según el encabezado descargado, o None."""
+        with self._lock:
+            return self._columnas.index(nombre) + 1 if nombre in self._columnas else None
+
+    def agregar(self, registro):
+        """Parcha la copia local tras escribir una fila nueva, sin volver a descargar."""
+        with self._lock:
+            self._por_nombre[normalizar_nombre(registro['nombre_completo'])] = registro
+            self._max_id = max(self._max_id, int(registro['id']))
+
+    def tiene_copia(self):
+        """True si ya hay una copia descargada con la que responder."""
+        with self._lock:
+            return self._cargado_en is not None
+
+    def invalidar(self):
+        """Obliga a descargar la hoja en el siguiente acceso."""
+        with self._lock:
+            if self._cargado_en is not None:
+                # Se conserva la copia por si la hoja no responde (modo degradado).
+                self._cargado_en = time.monotonic() - self._ttl - 1
+
+
+class AsignadorIds:
+    """Reserva ids y nombres para registros nuevos sin repetir ninguno.
+
+    La reserva ocurre bajo un candado y en O(1): el id sale de un contador que
+    arranca en el mayor id de la caché, y el nombre se aparta para que dos
+    registros simultáneos con el mismo nombre no pasen ambos. La escritura en la
+    hoja se hace fuera del candado, así que los registros no se forman en fila.
+    Cubre a todas las sesiones de este proceso (Streamlit corre uno solo).
+    """
+
+    def __init__(self, usuarios):
+        self._usuarios = usuarios
+        self._lock = threading.Lock()
+        self._ultimo_id = 0
+        self._nombres_reservados = set()
+
+    def reservar(self, nombre):
+        """Aparta el nombre y devuelve un id nuevo; lanza UsuarioExistente si ya está tomado."""
+        nombre = normalizar_nombre(nombre)
+        with self._lock:
+            # Los nombres nuevos no están en la caché por definición: no forzamos recarga.
+            if nombre in self._nombres_reservados or self._usuarios.buscar(nombre, recargar_si_falta=False):
+                raise UsuarioExistente(nombre)
+            self._ultimo_id = max(self._ultimo_id, self._usuarios.max_id()) + 1
+            self._nombres_reservados.add(nombre)
+            return self._ultimo_id
+
+    def reservar_varios(self, nombres):
+        """Aparta de una vez los nombres libres y les da un bloque de ids consecutivos.
+
+        Devuelve (nuevos, repetidos): `nuevos` es [(id, nombre)] y `repetidos` los
+        nombres ya registrados, reservados o que aparecen dos veces en la lista.
+        """
+        nuevos, repetidos = [], []
+        with self._lock:
+            vistos = set()
+            for nombre in map(normalizar_nombre, nombres):
+                if nombre in vistos or nombre in self._nombres_reservados or self._usuarios.buscar(nombre, recargar_si_falta=False):
+                    repetidos.append(nombre)
+                else:
+                    vistos.add(nombre)
+                    nuevos.append(nombre)
+            primero = max(self._ultimo_id, self._usuarios.max_id()) + 1
+            self._ultimo_id = primero + len(nuevos) - 1
+            self._nombres_reservados.update(vistos)
+        return list(zip(range(primero, primero + len(nuevos)), nuevos)), repetidos
+
+    def liberar(self, nombre):
+        """Quita la reserva del nombre (ya quedó en la caché o la escritura falló)."""
+        with self._lock:
+            self._nombres_reservados.discard(normalizar_nombre(nombre))
+
+
+# ==========================================
+# 3. RÉPLICA INCREMENTAL DE LA HOJA 'PROGRESO'
+# ==========================================
+# 'respuestas' guarda los índices elegidos en cada pregunta (ver calificacion.py).
+COLUMNAS_PROGRESO = ['usuario_id', 'sesion_id', 'puntaje', 'total', 'fecha_intento', 'respuestas']
+COLUMNAS_TEXTO_PROGRESO = {'respuestas'}
+
+# Entre dos lecturas de la cola de la hoja dejamos pasar al menos este tiempo.
+INTERVALO_SINCRONIZACION_SEGUNDOS = 5
+
+
+class SincronizadorProgreso:
+    """Réplica local de 'Progreso' que solo descarga las filas nuevas.
+
+    La hoja es de solo agregar, así que basta recordar cuántas filas ya leímos
+    (la marca de agua) y pedir el rango que empieza después de ella.
+    `leer_rango` es una función que recibe un rango A1 y devuelve sus valores.
+    Si la hoja no responde se sigue sirviendo la réplica que ya se tiene.
+    Si el encabezado de la hoja es una versión anterior de `columnas` (le faltan
+    las últimas), se completa con ellas.
+    La descarga (con sus reintentos y esperas de cuota) no toma el candado de los
+    datos: marcar un intento o consultar el índice no espera a la red.
+    """
+
+    def __init__(self, leer_rango, intervalo=INTERVALO_SINCRONIZACION_SEGUNDOS, columnas=COLUMNAS_PROGRESO):
+        self._leer_rango = leer_rango
+        self._intervalo = intervalo
+        self._columnas = columnas
+        # Datos de la réplica; se toma solo por lo que tarda leerlos o modificarlos.
+        self._lock = threading.RLock()
+        # Una sincronización a la vez; este sí se sostiene mientras se lee la hoja.
+        self._lock_sincronizacion = threading.Lock()
+        self._encabezado = None
+        self._filas = []
+        self._sesiones_por_usuario = {}
+        self._sincronizado_en = None
+
+    @property
+    def marca_agua(self):
+        """Número de filas de datos ya leídas (sin contar el encabezado)."""
+        return len(self._filas)
+
+    def _indexar(self, registro):
+        try:
+            usuario_id = int(registro['usuario_id'])
+        except (KeyError, TypeError, ValueError):
+            return
+        # Usamos un dict como conjunto ordenado: conserva el orden del primer intento.
+        self._sesiones_por_usuario.setdefault(usuario_id, {})[registro['sesion_id']] = True
+
+    def sincronizar(self, forzar=False):
+        """Descarga solo las filas agregadas desde la última lectura."""
+        with self._lock_sincronizacion:
+            if (not forzar and self._sincronizado_en is not None
+                    and time.monotonic() - self._sincronizado_en < self._intervalo):
+                return 0
+            # Solo otra sincronización agrega filas, así que la marca no cambia mientras se lee.
+            encabezado = self._encabezado
+            if encabezado is None:
+                # Primera lectura: encabezado y todo lo que haya (solo una vez por proceso).
+                valores = self._leer_rango("A1:Z")
+                if not valores:
+                    self._sincronizado_en = time.monotonic()
+                    return 0
+                encabezado, valores = valores[0], valores[1:]
+                if encabezado == self._columnas[:len(encabezado)]:
+                    encabezado = list(self._columnas)
+            else:
+                ultima_col = rowcol_to_a1(1, len(encabezado))[:-1]
+                inicio = len(self._filas) + 2
+                try:
+                    valores = self._leer_rango(f"A{inicio}:{ultima_col}")
+                except ServicioNoDisponible:
+                    # Modo degradado: se sirve la réplica local tal como está.
+                    self._sincronizado_en = time.monotonic()
+                    return 0
+            # Columnas de texto que no deben convertirse a número ("0,2,1" parecería un millar).
+            texto = [i + 1 for i, c in enumerate(encabezado) if c in COLUMNAS_TEXTO_PROGRESO]
+            # Las filas vacías se guardan igual para no desalinear la marca de agua.
+            registros = [
+                dict(zip(encabezado, numericise_all(list(fila) + [''] * (len(encabezado) - len(fila)), ignore=texto)))
+                for fila in valores
+            ]
+            with self._lock:
+                self._encabezado = encabezado
+                for registro in registros:
+                    self._filas.append(registro)
+                    self._indexar(registro)
+            self._sincronizado_en = time.monotonic()
+            return len(valores)
+
+    def sesiones_de(self, usuario_id):
+        """Sesiones que el alumno ha intentado, en orden del primer intento."""
+        with self._lock:
+            return list(self._sesiones_por_usuario.get(int(usuario_id), {}))
+
+    def marcar(self, usuario_id, sesion_id):
+        """Refleja de inmediato un intento recién escrito en el índice por alumno.
+
+        La fila en sí llega con la siguiente sincronización, así la marca de agua
+        sigue las filas reales de la hoja aunque otros procesos también escriban.
+        """
+        with self._lock:
+            self._sesiones_por_usuario.setdefault(int(usuario_id), {})[sesion_id] = True
+
+    def registros(self, desde=0):
+        """Filas leídas a partir de la posición `desde` (las vacías se omiten)."""
+        with self._lock:
+            return [r for r in self._filas[desde:] if any(str(v).strip() for v in r.values())]
+
+    def registros_y_marca(self, desde=0):
+        """(registros desde `desde`, marca de agua) leídos bajo el mismo candado.
+
+        Leerlos por separado dejaría que otra sincronización se cuele en medio y
+        la marca saltaría filas que el llamador nunca recibió.
+        """
+        with self._lock:
+            return self.registros(desde), len(self._filas)
+
+    def filas_donde(self, columna, valor):
+        """(número de fila en la hoja, registro) de las filas con `columna == valor`."""
+        with self._lock:
+            return [(i + 2, r) for i, r in enumerate(self._filas) if r.get(columna) == valor]
+
+    def columna(self, nombre):
+        """Letra de la columna con ese encabezado (None si todavía no se leyó)."""
+        with self._lock:
+            if not self._encabezado or nombre not in self._encabezado:
+                return None
+            return rowcol_to_a1(1, self._encabezado.index(nombre) + 1)[:-1]
+
+    def actualizar_valores(self, columna, cambios):
+        """Refleja en la réplica valores ya escritos en la hoja: [(número de fila, valor)]."""
+        with self._lock:
+            for numero_fila, valor in cambios:
+                self._filas[numero_fila - 2][columna] = valor
+
+
+# ==========================================
+# 4. ESCRITURA DIFERIDA DE INTENTOS (SPOOL LOCAL)
+# ==========================================
+RUTA_SPOOL = "spool_progreso.sqlite3"
+# El hilo escritor vacía la cola cada tantos segundos o al juntar un lote completo.
+INTERVALO_ESCRITURA_SEGUNDOS = 3
+LOTE_ESCRITURA = 50
+
+
+class EscritorDiferido:
+    """Cola de escritura en segundo plano hacia una hoja de solo agregar.
+
+    Cada fila se guarda primero en un spool SQLite local (sobrevive a un reinicio
+    del servidor) y un hilo la envía después con `append_rows` junto con las demás
+    pendientes. Una fila solo se borra del spool cuando la hoja confirmó la
+    escritura; si el proceso muere entre ambos pasos la fila se reenvía
+    (entrega al menos una vez). `agregar_filas` recibe la lista de filas a escribir.
+    """
+
+    def __init__(self, agregar_filas, ruta=RUTA_SPOOL, intervalo=INTERVALO_ESCRITURA_SEGUNDOS,
+                 lote=LOTE_ESCRITURA, tabla="pendientes"):
+        self._agregar_filas = agregar_filas
+        self._intervalo = intervalo
+        self._lote = lote
+        self._tabla = tabla
+        self._db = sqlite3.connect(ruta, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            f"CREATE TABLE IF NOT EXISTS {tabla} (id INTEGER PRIMARY KEY AUTOINCREMENT, fila TEXT NOT NULL)"
+        )
+        self._lock_db = threading.Lock()
+        self._lock_vaciado = threading.Lock()
+        self._despertar = threading.Event()
+        self._detener = threading.Event()
+        self._escritas = 0
+        self._ultima_escritura = None
+        self._ultimo_error = None
+        self._hilo = threading.Thread(target=self._bucle, name="escritor-progreso", daemon=True)
+        self._hilo.start()
+        atexit.register(self.cerrar)
+
+    def _pendientes(self):
+        with self._lock_db:
+            return self._db.execute(f"SELECT COUNT(*) FROM {self._tabla}").fetchone()[0]
+
+    def filas_pendientes(self):
+        """Filas que siguen en el spool, en orden de llegada."""
+        with self._lock_db:
+            return [json.loads(f) for (f,) in self._db.execute(f"SELECT fila FROM {self._tabla} ORDER BY id")]
+
+    def encolar(self, fila):
+        """Persiste la fila en el spool y regresa de inmediato."""
+        with self._lock_db:
+            self._db.execute(f"INSERT INTO {self._tabla} (fila) VALUES (?)", (json.dumps(fila),))
+        if self._pendientes() >= self._lote:
+            self._despertar.set()
+
+    def encolar_varias(self, filas):
+        """Persiste varias filas en el spool en una sola transacción."""
+        with self._lock_db:
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany(f"INSERT INTO {self._tabla} (fila) VALUES (?)", [(json.dumps(f),) for f in filas])
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+        if self._pendientes() >= self._lote:
+            self._despertar.set()
+
+    def _bucle(self):
+        while not self._detener.is_set():
+            self._despertar.wait(self._intervalo)
+            self._despertar.clear()
+            self.vaciar()
+
+    def vaciar(self):
+        """Envía a la hoja todo lo pendiente, en lotes. Devuelve cuántas filas escribió."""
+        escritas = 0
+        with self._lock_vaciado:
+            while True:
+                with self._lock_db:
+                    lote = self._db.execute(
+                        f"SELECT id, fila FROM {self._tabla} ORDER BY id LIMIT ?", (self._lote,)
+                    ).fetchall()
+                if not lote:
+                    break
+                try:
+                    self._agregar_filas([json.loads(fila) for _, fila in lote])
+                except Exception as e:
+                    # Se reintenta en el siguiente ciclo; el spool conserva las filas.
+                    self._ultimo_error = str(e)
+                    break
+                with self._lock_db:
+                    self._db.execute(f"DELETE FROM {self._tabla} WHERE id <= ?", (lote[-1][0],))
+                escritas += len(lote)
+                self._escritas += len(lote)
+                self._ultima_escritura = time.time()
+                self._ultimo_error = None
+        return escritas
+
+    def estado(self):
+        """Resumen para mostrar en el tablero: pendientes, escritas y último error."""
+        return {
+            "pendientes": self._pendientes(),
+            "escritas": self._escritas,
+            "ultima_escritura": self._ultima_escritura,
+            "ultimo_error": self._ultimo_error,
+        }
+
+    def cerrar(self):
+        """Detiene el hilo y hace un último vaciado (se llama también al salir)."""
+        if self._detener.is_set():
+            return
+        self._detener.set()
+        self._despertar.set()
+        self._hilo.join(timeout=self._intervalo + 5)
+        self.vaciar()
+
+
+# ==========================================
+# 5. INTERFAZ DE ALMACENAMIENTO
+# ==========================================
+class UsuarioExistente(Exception):
+    """Ya hay un alumno registrado con ese nombre_completo."""
+
+
+class Almacen:
+    """Operaciones de datos que necesita la app, independientes del backend."""
+
+    def conectar(self):
+        """Verifica que el backend esté disponible (lanza excepción si no)."""
+
+    def buscar_usuario(self, nombre):
+        """Registro del alumno con ese nombre (ya normalizado) o None."""
+        raise NotImplementedError
+
+    def usuarios(self):
+        """Lista de todos los registros de usuarios."""
+        raise NotImplementedError
+
+    def registrar_usuario(self, nombre, escuela, grupo, fecha, password):
+        """Crea el usuario y devuelve su id; lanza UsuarioExistente si ya existe.
+
+        `password` llega ya cifrada (ver credenciales.py).
+        """
+        raise NotImplementedError
+
+    def registrar_usuarios(self, filas):
+        """Crea varios usuarios en una sola escritura.
+
+        `filas` son [nombre, escuela, grupo, fecha, password] (password ya cifrada).
+        Devuelve (creados, repetidos): `creados` es [(id, nombre)] y `repetidos`
+        los nombres que ya existían o venían duplicados, que no se escriben.
+        """
+        raise NotImplementedError
+
+    def actualizar_password(self, usuario, password):
+        """Reemplaza la contraseña guardada del usuario (registro de buscar_usuario)."""
+        raise NotImplementedError
+
+    def sesiones_completadas(self, usuario_id):
+        """sesion_id intentados por el alumno, en orden del primer intento."""
+        raise NotImplementedError
+
+    def guardar_intento(self, fila):
+        """Agrega un intento con el orden de COLUMNAS_PROGRESO."""
+        raise NotImplementedError
+
+    def guardar_intentos(self, filas):
+        """Agrega muchos intentos (p. ej. hojas en papel) en una sola escritura."""
+        raise NotImplementedError
+
+    def intentos(self, desde=0):
+        """Intentos posteriores a la marca `desde`; devuelve (registros, nueva_marca)."""
+        raise NotImplementedError
+
+    def respuestas_de_sesion(self, sesion_id):
+        """Intentos de la sesión como dicts con 'posicion', 'puntaje', 'total' y 'respuestas'.
+
+        `posicion` identifica la fila para `actualizar_puntajes`.
+        """
+        raise NotImplementedError
+
+    def actualizar_puntajes(self, cambios):
+        """Corrige puntajes ya guardados en una sola operación: [(posicion, puntaje)]."""
+        raise NotImplementedError
+
+    def estado(self):
+        """Estado de las escrituras pendientes (mismo formato que EscritorDiferido.estado)."""
+        return {"pendientes": 0, "escritas": 0, "ultima_escritura": None, "ultimo_error": None, "degradado": False}
+
+    def refrescar(self):
+        """Descarta copias locales para releer del origen."""
+
+
+# ==========================================
+# 6. BACKEND GOOGLE SHEETS
+# ==========================================
+class AlmacenSheets(Almacen):
+    """Hojas 'Usuarios' y 'Progreso' de Google Sheets, con cachés y escritura diferida."""
+
+    def __init__(self, conexion, ttl_usuarios=TTL_USUARIOS_SEGUNDOS, ruta_spool=RUTA_SPOOL):
+        self.conexion = conexion
+        # Los registros hechos sin cuota esperan en su propio spool hasta que Sheets responda.
+        self.escritor_usuarios = EscritorDiferido(
+            lambda filas: conexion.ejecutar(lambda: conexion.hoja("Usuarios").append_rows(filas), escritura=True),
+            ruta=ruta_spool, tabla="pendientes_usuarios",
+        )
+        self.usuarios_cache = CacheUsuarios(
+            lambda: conexion.ejecutar(lambda: conexion.hoja("Usuarios").get_all_records()),
+            ttl=ttl_usuarios,
+            pendientes=lambda: [dict(zip(COLUMNAS_USUARIOS, f)) for f in self.escritor_usuarios.filas_pendientes()],
+        )
+        self.asignador = AsignadorIds(self.usuarios_cache)
+        # Contraseñas migradas a scrypt en el ingreso: salen en lote, sin leer la hoja por alumno.
+        self.escritor_passwords = EscritorDiferido(
+            self._escribir_passwords, ruta=ruta_spool, tabla="pendientes_passwords"
+        )
+        self.progreso = SincronizadorProgreso(
+            lambda rango: conexion.ejecutar(lambda: conexion.hoja("Progreso").get(rango))
+        )
+        self.escritor = EscritorDiferido(self._agregar_progreso, ruta=ruta_spool)
+        self._encabezado_revisado = False
+
+    def _agregar_progreso(self, filas):
+        hoja = lambda: self.conexion.hoja("Progreso")
+        if not self._encabezado_revisado:
+            # Hojas creadas antes de que existieran columnas nuevas: se completa el encabezado.
+            encabezado = self.conexion.ejecutar(lambda: hoja().row_values(1))
+            if len(encabezado) < len(COLUMNAS_PROGRESO) and encabezado == COLUMNAS_PROGRESO[:len(encabezado)]:
+                self.conexion.ejecutar(
+                    lambda: hoja().update(range_name="A1", values=[COLUMNAS_PROGRESO]), escritura=True
+                )
+            self._encabezado_revisado = True
+        self.conexion.ejecutar(lambda: hoja().append_rows(filas), escritura=True)
+
+    def conectar(self):
+        try:
+            self.conexion.libro()
+        except ServicioNoDisponible:
+            # Sin Sheets pero con la copia de 'Usuarios': los alumnos pueden seguir entrando.
+            if not self.usuarios_cache.tiene_copia():
+                raise
+
+    def buscar_usuario(self, nombre):
+        return self.usuarios_cache.buscar(nombre)
+
+    def usuarios(self):
+        return self.usuarios_cache.registros()
+
+    def registrar_usuario(self, nombre, escuela, grupo, fecha, password):
+        nuevo_id = self.asignador.reservar(nombre)
+        try:
+            nuevo_usuario = [int(nuevo_id), normalizar_nombre(nombre), escuela, grupo, fecha, password]
+            try:
+                self.conexion.ejecutar(lambda: self.conexion.hoja("Usuarios").append_row(nuevo_usuario), escritura=True)
+            except ServicioNoDisponible:
+                # Sin cuota: el alumno queda registrado en el spool y puede entrar de inmediato.
+                self.escritor_usuarios.encolar(nuevo_usuario)
+            self.usuarios_cache.agregar(dict(zip(COLUMNAS_USUARIOS, nuevo_usuario)))
+        finally:
+            self.asignador.liberar(nombre)
+        return nuevo_id
+
+    def registrar_usuarios(self, filas):
+        datos = {normalizar_nombre(f[0]): f[1:] for f in reversed(filas)}  # gana la primera aparición
+        creados, repetidos = self.asignador.reservar_varios([f[0] for f in filas])
+        try:
+            nuevos = [[int(i), nombre] + list(datos[nombre]) for i, nombre in creados]
+            if nuevos:
+                try:
+                    self.conexion.ejecutar(lambda: self.conexion.hoja("Usuarios").append_rows(nuevos), escritura=True)
+                except ServicioNoDisponible:
+                    self.escritor_usuarios.encolar_varias(nuevos)
+                for fila in nuevos:
+                    self.usuarios_cache.agregar(dict(zip(COLUMNAS_USUARIOS, fila)))
+        finally:
+            for _, nombre in creados:
+                self.asignador.liberar(nombre)
+        return creados, repetidos
+
+    def _escribir_passwords(self, cambios):
+        """Escribe un lote de [fila, columna, id, password] con una lectura y una escritura."""
+        hoja = lambda: self.conexion.hoja("Usuarios")
+        # Se confirma que cada fila sigue siendo del mismo alumno: alguien pudo ordenar
+        # o borrar filas a mano desde que se descargó la hoja. Si no, se omite; el
+        # alumno se migra otra vez en un ingreso posterior.
+        ids = self.conexion.ejecutar(lambda: hoja().batch_get([rowcol_to_a1(c[0], 1) for c in cambios]))
+        datos = [
+            {'range': rowcol_to_a1(fila, columna), 'values': [[password]]}
+            for (fila, columna, usuario_id, password), celda in zip(cambios, ids)
+            if celda and celda[0] and str(celda[0][0]).strip() == str(usuario_id)
+        ]
+        if datos:
+            self.conexion.ejecutar(lambda: hoja().batch_update(datos), escritura=True)
+
+    def actualizar_password(self, usuario, password):
+        fila = self.usuarios_cache.fila(usuario['id'])
+        columna = self.usuarios_cache.columna('password')
+        self.usuarios_cache.agregar(dict(usuario, password=password))
+        if fila is None or columna is None:
+            # Todavía está en el spool de registros: se cambiará en un próximo ingreso.
+            return
+        self.escritor_passwords.encolar([fila, columna, int(usuario['id']), password])
+
+    def sesiones_completadas(self, usuario_id):
+        # Solo se descargan las filas nuevas; el resto sale del índice por alumno.
+        self.progreso.sincronizar()
+        return self.progreso.sesiones_de(usuario_id)
+
+    def guardar_intento(self, fila):
+        # La fila queda en el spool local y el escritor la manda en lote con otras.
+        self.escritor.encolar(fila)
+        self.progreso.marcar(fila[0], fila[1])
+
+    def guardar_intentos(self, filas):
+        # Directo a la hoja en un solo append_rows: por el spool saldrían en lotes de LOTE_ESCRITURA.
+        try:
+            self._agregar_progreso(filas)
+        except ServicioNoDisponible:
+            self.escritor.encolar_varias(filas)
+        for fila in filas:
+            self.progreso.marcar(fila[0], fila[1])
+
+    def intentos(self, desde=0):
+        self.progreso.sincronizar()
+        return self.progreso.registros_y_marca(desde)
+
+    def respuestas_de_sesion(self, sesion_id):
+        # Primero se manda lo que esté en el spool para recalificar también esos intentos.
+        self.escritor.vaciar()
+        self.progreso.sincronizar(forzar=True)
+        return [
+            {'posicion': numero_fila, 'puntaje': r['puntaje'], 'total': r['total'], 'respuestas': r.get('respuestas', '')}
+            for numero_fila, r in self.progreso.filas_donde('sesion_id', sesion_id)
+        ]
+
+    def actualizar_puntajes(self, cambios):
+        columna = self.progreso.columna('puntaje')
+        datos = [{'range': f"{columna}{numero_fila}", 'values': [[puntaje]]} for numero_fila, puntaje in cambios]
+        self.conexion.ejecutar(lambda: self.conexion.hoja("Progreso").batch_update(datos), escritura=True)
+        self.progreso.actualizar_valores('puntaje', cambios)
+
+    def estado(self):
+        estado = self.escritor.estado()
+        estado["pendientes"] += self.escritor_usuarios.estado()["pendientes"]
+        estado["degradado"] = self.conexion.degradado()
+        return estado
+
+    def refrescar(self):
+        self.usuarios_cache.invalidar()
+        self.progreso.sincronizar(forzar=True)
+
+
+# ==========================================
+# 7. BACKEND SQLITE (MODO WAL)
+# ==========================================
+RUTA_SQLITE = "tutor_exani.sqlite3"
+
+ESQUEMA_SQLITE = """
+CREATE TABLE IF NOT EXISTS usuarios (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre_completo TEXT NOT NULL,
+    escuela TEXT,
+    grupo TEXT,
+    fecha_registro TEXT,
+    password TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_usuarios_nombre ON usuarios (nombre_completo);
+CREATE TABLE IF NOT EXISTS progreso (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    usuario_id INTEGER NOT NULL,
+    sesion_id TEXT NOT NULL,
+    puntaje INTEGER,
+    total INTEGER,
+    fecha_intento TEXT,
+    respuestas TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_progreso_usuario ON progreso (usuario_id, sesion_id);
+CREATE INDEX IF NOT EXISTS idx_progreso_sesion ON progreso (sesion_id);
+"""
+
+
+class AlmacenSQLite(Almacen):
+    """Base de datos local en un archivo SQLite con journal WAL.
+
+    Cada hilo usa su propia conexión: en WAL los lectores no bloquean al escritor.
+    """
+
+    def __init__(self, ruta=RUTA_SQLITE):
+        self._ruta = ruta
+        self._local = threading.local()
+        with self._db() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(ESQUEMA_SQLITE)
+            # Bases creadas con una versión anterior del esquema.
+            existentes = {f["name"] for f in db.execute("PRAGMA table_info(progreso)")}
+            for columna in COLUMNAS_PROGRESO:
+                if columna not in existentes:
+                    db.execute(f"ALTER TABLE progreso ADD COLUMN {columna} TEXT")
+
+    def _db(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self._ruta, timeout=30)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def buscar_usuario(self, nombre):
+        fila = self._db().execute(
+            "SELECT * FROM usuarios WHERE nombre_completo = ?", (normalizar_nombre(nombre),)
+        ).fetchone()
+        return dict(fila) if fila else None
+
+    def usuarios(self):
+        return [dict(f) for f in self._db().execute("SELECT * FROM usuarios ORDER BY id")]
+
+    def registrar_usuario(self, nombre, escuela, grupo, fecha, password):
+        try:
+            with self._db() as db:
+                cursor = db.execute(
+                    "INSERT INTO usuarios (nombre_completo, escuela, grupo, fecha_registro, password) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (normalizar_nombre(nombre), escuela, grupo, fecha, password),
+                )
+        except sqlite3.IntegrityError:
+            raise UsuarioExistente(nombre)
+        return cursor.lastrowid
+
+    def registrar_usuarios(self, filas):
+        creados, repetidos = [], []
+        # Una sola transacción: los nombres repetidos fallan por el índice único sin deshacer los demás.
+        with self._db() as db:
+            for nombre, escuela, grupo, fecha, password in filas:
+                nombre = normalizar_nombre(nombre)
+                try:
+                    cursor = db.execute(
+                        "INSERT INTO usuarios (nombre_completo, escuela, grupo, fecha_registro, password) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (nombre, escuela, grupo, fecha, password),
+                    )
+                except sqlite3.IntegrityError:
+                    repetidos.append(nombre)
+                else:
+                    creados.append((cursor.lastrowid, nombre))
+        return creados, repetidos
+
+    def actualizar_password(self, usuario, password):
+        with self._db() as db:
+            db.execute("UPDATE usuarios SET password = ? WHERE id = ?", (password, int(usuario['id'])))
+
+    def sesiones_completadas(self, usuario_id):
+        filas = self._db().execute(
+            "SELECT sesion_id FROM progreso WHERE usuario_id = ? GROUP BY sesion_id ORDER BY MIN(id)",
+            (int(usuario_id),),
+        )
+        return [f[0] for f in filas]
+
+    def guardar_intento(self, fila):
+        fila = list(fila) + [None] * (len(COLUMNAS_PROGRESO) - len(fila))
+        with self._db() as db:
+            db.execute(
+                f"INSERT INTO progreso ({', '.join(COLUMNAS_PROGRESO)}) VALUES ({', '.join('?' * len(fila))})",
+                fila,
+            )
+
+    def guardar_intentos(self, filas):
+        filas = [list(f) + [None] * (len(COLUMNAS_PROGRESO) - len(f)) for f in filas]
+        with self._db() as db:
+            db.executemany(
+                f"INSERT INTO progreso ({', '.join(COLUMNAS_PROGRESO)}) VALUES ({', '.join('?' * len(COLUMNAS_PROGRESO))})",
+                filas,
+            )
+
+    def intentos(self, desde=0):
+        filas = self._db().execute(
+            f"SELECT id, {', '.join(COLUMNAS_PROGRESO)} FROM progreso WHERE id > ? ORDER BY id",
+            (desde,),
+        ).fetchall()
+        marca = filas[-1]["id"] if filas else desde
+        return [{c: f[c] for c in COLUMNAS_PROGRESO} for f in filas], marca
+
+    def respuestas_de_sesion(self, sesion_id):
+        filas = self._db().execute(
+            "SELECT id AS posicion, puntaje, total, respuestas FROM progreso WHERE sesion_id = ? ORDER BY id",
+            (sesion_id,),
+        )
+        return [dict(f) for f in filas]
+
+    def actualizar_puntajes(self, cambios):
+        with self._db() as db:
+            db.executemany("UPDATE progreso SET puntaje = ? WHERE id = ?", [(p, i) for i, p in cambios])
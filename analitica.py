@@ -0,0 +1,465 @@
+"""Tablas de análisis del panel docente, mantenidas en memoria por incrementos."""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from calificacion import SIN_RESPUESTA, claves_de_variantes, matriz_respuestas
+from contenido import ErrorContenido
+
+# ==========================================
+# 1. HISTORIAL MATERIALIZADO (INTENTOS + ALUMNOS)
+# ==========================================
+FORMATO_FECHA = "%Y-%m-%d %H:%M:%S"
+
+COLUMNAS_ALUMNO = ['nombre_completo', 'grupo', 'escuela']
+COLUMNAS_CATEGORICAS = ['sesion_id'] + COLUMNAS_ALUMNO
+TIPOS_HISTORIAL = {
+    'usuario_id': 'int32',
+    'sesion_id': 'category',
+    'puntaje': 'int16',
+    'total': 'int16',
+    'fecha_intento': 'datetime64[ns]',
+    'nombre_completo': 'category',
+    'grupo': 'category',
+    'escuela': 'category',
+}
+
+
+CAPACIDAD_INICIAL = 1024
+
+
+class _ColumnasHistorial:
+    """Columnas del historial en arreglos con capacidad de sobra.
+
+    Agregar un lote copia solo sus filas; cuando un arreglo se llena se duplica
+    su capacidad. Las columnas categóricas se guardan como códigos y un dict de
+    categorías en orden de llegada. El DataFrame se arma al leerlo, sobre vistas
+    de los arreglos, y se reutiliza hasta que llega otro lote.
+    """
+
+    def __init__(self):
+        self.filas = 0
+        self._datos = {
+            c: np.empty(0, dtype='int32' if c in COLUMNAS_CATEGORICAS else t) for c, t in TIPOS_HISTORIAL.items()
+        }
+        # columna -> {valor: código}
+        self._categorias = {c: {} for c in COLUMNAS_CATEGORICAS}
+        self._vista = None
+
+    def _codigos(self, col, valores):
+        codigos = self._categorias[col]
+        return np.array(
+            [-1 if pd.isna(v) else codigos.setdefault(v, len(codigos)) for v in valores], dtype=np.int32
+        )
+
+    def agregar(self, nuevas):
+        """Copia al final las filas de `nuevas` (tabla con el formato de TIPOS_HISTORIAL)."""
+        inicio, fin = self.filas, self.filas + len(nuevas)
+        if fin > len(self._datos['usuario_id']):
+            capacidad = max(CAPACIDAD_INICIAL, 2 * fin)
+            for col, arreglo in self._datos.items():
+                crecido = np.empty(capacidad, dtype=arreglo.dtype)
+                crecido[:inicio] = arreglo[:inicio]
+                self._datos[col] = crecido
+        for col, arreglo in self._datos.items():
+            if col in COLUMNAS_CATEGORICAS:
+                # Se traducen las categorías del lote (pocas), no sus filas.
+                mapa = np.append(self._codigos(col, nuevas[col].cat.categories), np.int32(-1))
+                arreglo[inicio:fin] = mapa[nuevas[col].cat.codes.to_numpy()]
+            else:
+                arreglo[inicio:fin] = nuevas[col].to_numpy(dtype=arreglo.dtype)
+        self.filas = fin
+        self._vista = None
+
+    def columna(self, col):
+        """Vista de solo lectura de una columna (códigos, si es categórica)."""
+        vista = self._datos[col][:self.filas]
+        vista.flags.writeable = False
+        return vista
+
+    def reemplazar(self, col, posiciones, valores):
+        """Cambia los valores de una columna categórica en `posiciones`."""
+        # Sobre una copia: los DataFrame ya entregados siguen viendo el arreglo anterior.
+        arreglo = self._datos[col].copy()
+        arreglo[posiciones] = self._codigos(col, valores)
+        self._datos[col] = arreglo
+        self._vista = None
+
+    def tabla(self):
+        if self._vista is None:
+            columnas = {}
+            for col in TIPOS_HISTORIAL:
+                datos = self.columna(col)
+                if col in COLUMNAS_CATEGORICAS:
+                    datos = pd.Categorical.from_codes(
+                        datos, categories=pd.Index(list(self._categorias[col])), validate=False
+                    )
+                columnas[col] = datos
+            self._vista = pd.DataFrame(columnas, copy=False)
+        return self._vista
+
+
+class HistorialMaterializado:
+    """Tabla de intentos ya unida con los datos del alumno y con tipos compactos.
+
+    Guarda la marca del último intento leído del almacén; cada `actualizar()`
+    pide solo los intentos nuevos, los une con el índice de alumnos y los agrega
+    al final. Las interacciones del panel trabajan sobre esta tabla en memoria.
+    También mantiene el orden de las filas por fecha: como los intentos llegan
+    en orden cronológico, casi siempre basta con extenderlo.
+    """
+
+    def __init__(self, almacen):
+        self._almacen = almacen
+        self._lock = threading.Lock()
+        self._marca = 0
+        self._columnas = _ColumnasHistorial()
+        self._orden = np.empty(0, dtype=np.int64)
+        self.agregados = AgregadosIncrementales()
+
+    def _alumnos(self):
+        """Datos de cada alumno indexados por id (nombre, grupo, escuela)."""
+        df_u = pd.DataFrame(self._almacen.usuarios(), columns=['id'] + COLUMNAS_ALUMNO)
+        df_u = df_u[pd.to_numeric(df_u['id'], errors='coerce').notna()]
+        df_u = df_u.assign(id=df_u['id'].astype('int64')).drop_duplicates('id', keep='last')
+        return df_u.set_index('id')[COLUMNAS_ALUMNO].astype(str)
+
+    def _tipar(self, registros, alumnos):
+        df = pd.DataFrame(registros)
+        df = df[pd.to_numeric(df['usuario_id'], errors='coerce').notna()]
+        ids = df['usuario_id'].astype('int64')
+        tabla = pd.DataFrame({
+            'usuario_id': ids.astype('int32'),
+            'sesion_id': df['sesion_id'].astype(str),
+            'puntaje': pd.to_numeric(df['puntaje'], errors='coerce').fillna(0).astype('int16'),
+            'total': pd.to_numeric(df['total'], errors='coerce').fillna(0).astype('int16'),
+            'fecha_intento': pd.to_datetime(df['fecha_intento'], format=FORMATO_FECHA, errors='coerce'),
+        }).reset_index(drop=True)
+        datos = alumnos.reindex(ids.to_numpy()).reset_index(drop=True)
+        for col in COLUMNAS_ALUMNO:
+            tabla[col] = datos[col]
+        for col in COLUMNAS_CATEGORICAS:
+            tabla[col] = tabla[col].astype('category')
+        return tabla
+
+    def _completar_alumnos(self, alumnos):
+        """Une de nuevo las filas cuyo alumno no estaba en el índice cuando llegaron."""
+        faltantes = np.flatnonzero(self._columnas.columna('nombre_completo') < 0)
+        if not len(faltantes):
+            return
+        datos = alumnos.reindex(self._columnas.columna('usuario_id')[faltantes])
+        if datos['nombre_completo'].isna().all():
+            return
+        for col in COLUMNAS_ALUMNO:
+            self._columnas.reemplazar(col, faltantes, datos[col])
+
+    def actualizar(self):
+        """Incorpora los intentos llegados desde la última llamada y devuelve la tabla."""
+        with self._lock:
+            registros, marca = self._almacen.intentos(self._marca)
+            if registros:
+                alumnos = self._alumnos()
+                previas = self._columnas.filas
+                nuevas = self._tipar(registros, alumnos)
+                self._columnas.agregar(nuevas)
+                self._completar_alumnos(alumnos)
+                self._extender_orden(previas, nuevas['fecha_intento'].to_numpy())
+                self.agregados.incorporar(nuevas)
+            self._marca = marca
+            return self._columnas.tabla()
+
+    def _extender_orden(self, previas, fechas_nuevas):
+        fechas = self._columnas.columna('fecha_intento')
+        en_orden = bool(np.all(fechas_nuevas[1:] >= fechas_nuevas[:-1]))
+        if en_orden and (previas == 0 or fechas_nuevas[0] >= fechas[self._orden[-1]]):
+            self._orden = np.concatenate([self._orden, np.arange(previas, len(fechas))])
+        else:
+            # Llegó algo fuera de orden (o con fecha vacía): se reordena todo una vez.
+            self._orden = np.argsort(fechas, kind='stable')
+
+    def tabla(self):
+        """Tabla actual sin consultar el almacén."""
+        with self._lock:
+            return self._columnas.tabla()
+
+    def alumnos(self):
+        """Datos de los alumnos indexados por id, para unir con los agregados."""
+        return self._alumnos()
+
+    def filtrar_bitacora(self, grupo=None, sesion=None, alumno=None, desde=None, hasta=None):
+        """Tabla y posiciones que pasan los filtros, de la más reciente a la más antigua."""
+        with self._lock:
+            tabla, orden = self._columnas.tabla(), self._orden
+        return tabla, filtrar_bitacora(tabla, orden, grupo, sesion, alumno, desde, hasta)
+
+
+# ==========================================
+# 2. BITÁCORA PAGINADA
+# ==========================================
+COLUMNAS_BITACORA = ['nombre_completo', 'grupo', 'sesion_id', 'puntaje', 'fecha_intento']
+TAMANO_PAGINA = 50
+
+
+def filtrar_bitacora(tabla, orden, grupo=None, sesion=None, alumno=None, desde=None, hasta=None):
+    """Posiciones que pasan los filtros, recorridas según el orden por fecha (descendente).
+
+    Los filtros se evalúan como máscaras vectorizadas (las columnas categóricas
+    se comparan por código) y no se ordena nada: se reutiliza `orden`.
+    """
+    mascara = np.ones(len(tabla), dtype=bool)
+    if grupo:
+        mascara &= (tabla['grupo'] == grupo).to_numpy()
+    if sesion:
+        mascara &= (tabla['sesion_id'] == sesion).to_numpy()
+    if alumno:
+        mascara &= (tabla['nombre_completo'] == alumno).to_numpy()
+    if desde is not None:
+        mascara &= (tabla['fecha_intento'] >= pd.Timestamp(desde)).to_numpy()
+    if hasta is not None:
+        # `hasta` es un día completo: se incluye hasta las 23:59:59.
+        mascara &= (tabla['fecha_intento'] < pd.Timestamp(hasta) + pd.Timedelta(days=1)).to_numpy()
+    descendente = orden[::-1]
+    return descendente[mascara[descendente]]
+
+
+def pagina_bitacora(tabla, posiciones, numero, tamano=TAMANO_PAGINA):
+    """Solo las filas de la página pedida (numerada desde 1)."""
+    inicio = (numero - 1) * tamano
+    return tabla.iloc[posiciones[inicio:inicio + tamano]][COLUMNAS_BITACORA]
+
+
+# ==========================================
+# 3. AGREGADOS INCREMENTALES
+# ==========================================
+class AgregadosIncrementales:
+    """Estadísticas por sesión, grupo y alumno que se actualizan con cada lote nuevo.
+
+    Solo se acumulan sumas, máximos y conteos por (sesión) y por (alumno); los
+    totales por grupo se obtienen al mostrar, uniendo el resumen por alumno con su
+    grupo actual. Así nunca se recorre el historial completo.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # sesion_id -> [intentos, suma de %, mejor %, alumnos distintos]
+        self._por_sesion = {}
+        # usuario_id -> [intentos, fecha del último intento, sesión del último intento]
+        self._por_alumno = {}
+        self._pares = set()
+
+    def incorporar(self, nuevas):
+        """Suma un lote de intentos (tabla con el formato del historial materializado)."""
+        if nuevas.empty:
+            return
+        total = nuevas['total'].to_numpy(dtype=np.float64)
+        pct = np.where(total > 0, nuevas['puntaje'].to_numpy() * 100.0 / np.where(total > 0, total, 1), 0.0)
+        lote = pd.DataFrame({
+            'usuario_id': nuevas['usuario_id'].to_numpy(),
+            'sesion_id': nuevas['sesion_id'].astype(str).to_numpy(),
+            'pct': pct,
+            'fecha_intento': nuevas['fecha_intento'].to_numpy(),
+        })
+        por_sesion = lote.groupby('sesion_id').agg(intentos=('pct', 'size'), suma=('pct', 'sum'), mejor=('pct', 'max'))
+        ultimos = lote.sort_values('fecha_intento', kind='stable').groupby('usuario_id').agg(
+            intentos=('pct', 'size'), fecha=('fecha_intento', 'last'), sesion=('sesion_id', 'last')
+        )
+        pares = set(zip(lote['usuario_id'].tolist(), lote['sesion_id'].tolist()))
+        with self._lock:
+            for sesion, fila in por_sesion.iterrows():
+                acumulado = self._por_sesion.setdefault(sesion, [0, 0.0, 0.0, 0])
+                acumulado[0] += int(fila['intentos'])
+                acumulado[1] += float(fila['suma'])
+                acumulado[2] = max(acumulado[2], float(fila['mejor']))
+            for usuario_id, sesion in pares - self._pares:
+                self._por_sesion[sesion][3] += 1
+            self._pares |= pares
+            for usuario_id, fila in ultimos.iterrows():
+                acumulado = self._por_alumno.setdefault(int(usuario_id), [0, pd.NaT, None])
+                acumulado[0] += int(fila['intentos'])
+                if pd.isna(acumulado[1]) or (pd.notna(fila['fecha']) and fila['fecha'] >= acumulado[1]):
+                    acumulado[1], acumulado[2] = fila['fecha'], fila['sesion']
+
+    def por_sesion(self, total_alumnos, orden_sesiones=None):
+        """Promedio y mejor % por sesión, intentos y tasa de alumnos que ya la hicieron."""
+        with self._lock:
+            filas = [(s, *v) for s, v in self._por_sesion.items()]
+        df = pd.DataFrame(filas, columns=['sesion_id', 'intentos', 'suma', 'mejor_pct', 'alumnos'])
+        df['promedio_pct'] = (df['suma'] / df['intentos']).round(1)
+        df['tasa_completado_pct'] = (df['alumnos'] * 100.0 / max(total_alumnos, 1)).round(1)
+        if orden_sesiones:
+            posicion = {s: i for i, s in enumerate(orden_sesiones)}
+            df = df.assign(_pos=df['sesion_id'].map(posicion)).sort_values(['_pos', 'sesion_id']).drop(columns='_pos')
+        return df[['sesion_id', 'intentos', 'promedio_pct', 'mejor_pct', 'alumnos', 'tasa_completado_pct']].reset_index(drop=True)
+
+    def por_alumno(self, alumnos):
+        """Intentos y última actividad de cada alumno; `alumnos` viene indexado por id."""
+        with self._lock:
+            filas = [(u, *v) for u, v in self._por_alumno.items()]
+        df = pd.DataFrame(filas, columns=['usuario_id', 'intentos', 'ultima_actividad', 'ultima_sesion'])
+        datos = alumnos.reindex(df['usuario_id'].to_numpy()).reset_index(drop=True)
+        df = pd.concat([datos[['nombre_completo', 'grupo']], df], axis=1)
+        return df.sort_values('ultima_actividad', ascending=False, na_position='last').reset_index(drop=True)
+
+    def por_grupo(self, alumnos):
+        """Intentos y alumnos activos por grupo (según el grupo actual de cada alumno)."""
+        df = self.por_alumno(alumnos)
+        df['grupo'] = df['grupo'].fillna("Sin grupo")
+        return (df.groupby('grupo')
+                  .agg(intentos=('intentos', 'sum'), alumnos_activos=('usuario_id', 'size'))
+                  .sort_values('intentos', ascending=False)
+                  .reset_index())
+
+
+# ==========================================
+# 4. ANÁLISIS DE REACTIVOS
+# ==========================================
+# Umbrales usuales de la teoría clásica de los tests.
+UMBRAL_MUY_FACIL = 0.90
+UMBRAL_MUY_DIFICIL = 0.20
+UMBRAL_DISCRIMINACION = 0.20
+COLUMNAS_REACTIVOS = ['sesion_id', 'numero', 'pregunta', 'respuestas', 'dificultad_p', 'discriminacion', 'diagnostico']
+
+
+def estadisticas_reactivos(matriz, claves, num_opciones):
+    """Índice de dificultad, discriminación y frecuencia de cada opción, por pregunta.
+
+    `matriz` tiene un intento por fila y el índice elegido en cada pregunta;
+    `claves` es un vector común o una matriz con la clave de cada intento.
+    - dificultad p: proporción de aciertos;
+    - discriminación: correlación punto-biserial entre acertar la pregunta y el
+      puntaje en el resto de la sesión (NaN si alguna de las dos no varía);
+    - frecuencias: conteos (preguntas x opciones+1); la columna 0 es "sin respuesta".
+    """
+    num_opciones = np.asarray(num_opciones, dtype=np.int64)
+    matriz = np.where(matriz < num_opciones, matriz, SIN_RESPUESTA).astype(np.int64)
+    aciertos = (matriz == np.asarray(claves, dtype=np.int64)).astype(np.float64)
+    dificultad = aciertos.mean(axis=0)
+    resto = aciertos.sum(axis=1, keepdims=True) - aciertos
+    a = aciertos - dificultad
+    r = resto - resto.mean(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        discriminacion = (a * r).sum(axis=0) / np.sqrt((a * a).sum(axis=0) * (r * r).sum(axis=0))
+    preguntas, ancho = matriz.shape[1], int(num_opciones.max()) + 1
+    codigos = np.arange(preguntas) * ancho + matriz + 1
+    frecuencias = np.bincount(codigos.ravel(), minlength=preguntas * ancho).reshape(preguntas, ancho)
+    return dificultad, discriminacion, frecuencias
+
+
+def diagnostico_reactivo(dificultad, discriminacion):
+    if dificultad >= UMBRAL_MUY_FACIL:
+        return "Muy fácil"
+    if dificultad <= UMBRAL_MUY_DIFICIL:
+        return "Muy difícil"
+    if np.isnan(discriminacion) or discriminacion < UMBRAL_DISCRIMINACION:
+        return "Discrimina poco"
+    return "Adecuada"
+
+
+class AnalisisReactivos:
+    """Análisis de las preguntas del curso sobre todas las respuestas guardadas.
+
+    Igual que el historial materializado, lee del almacén solo los intentos
+    nuevos. Las respuestas de cada sesión se decodifican una sola vez a una
+    matriz que crece por incrementos; las estadísticas se recalculan solo si
+    llegaron intentos o cambiaron las claves de la sesión.
+    """
+
+    def __init__(self, almacen, catalogo):
+        self._almacen = almacen
+        self._catalogo = catalogo
+        self._lock = threading.Lock()
+        self._marca = 0
+        # sesion_id -> textos de respuestas tal como se guardaron
+        self._textos = {}
+        # sesion_id -> (huella del contenido, textos ya decodificados, respuestas y variantes utilizables)
+        self._matrices = {}
+        # sesion_id -> (huella de los datos, (dificultad, discriminación, frecuencias))
+        self._resultados = {}
+
+    def actualizar(self):
+        """Incorpora las respuestas de los intentos llegados desde la última llamada."""
+        with self._lock:
+            registros, marca = self._almacen.intentos(self._marca)
+            for registro in registros:
+                respuestas = registro.get('respuestas')
+                if respuestas not in (None, ''):
+                    self._textos.setdefault(str(registro['sesion_id']), []).append(respuestas)
+            self._marca = marca
+
+    def _matriz(self, sesion_id, sesion):
+        textos = self._textos.get(sesion_id, [])
+        num_preguntas, huella = len(sesion['ids']), sesion['huella']
+        anterior, leidos, matriz, variantes = self._matrices.get(sesion_id, (huella, 0, None, None))
+        if matriz is None or anterior != huella:
+            # Primera vez o cambiaron las preguntas: se decodifica todo de nuevo y se
+            # descartan los intentos que guardaron la huella de otra versión.
+            leidos = 0
+            matriz = np.empty((0, num_preguntas), dtype=np.int8)
+            variantes = np.empty((0, num_preguntas), dtype=np.int64)
+        if leidos < len(textos):
+            nuevas, validas, nuevas_variantes = matriz_respuestas(textos[leidos:], num_preguntas, huella)
+            matriz = np.concatenate([matriz, nuevas[validas]])
+            variantes = np.concatenate([variantes, nuevas_variantes[validas]])
+        self._matrices[sesion_id] = (huella, len(textos), matriz, variantes)
+        return matriz, variantes
+
+    def _estadisticas(self, sesion_id):
+        """(sesión compilada, matriz, estadísticas) o None si no hay datos utilizables."""
+        try:
+            sesion = self._catalogo[sesion_id]
+        except (KeyError, ErrorContenido):
+            return None
+        matriz, variantes = self._matriz(sesion_id, sesion)
+        if not len(matriz):
+            return None
+        huella = (len(matriz), sesion['huella'], sesion['claves_variantes'].tobytes(), sesion['num_opciones'].tobytes())
+        guardado = self._resultados.get(sesion_id)
+        if guardado is None or guardado[0] != huella:
+            claves = claves_de_variantes(sesion['claves_variantes'], variantes)
+            guardado = (huella, estadisticas_reactivos(matriz, claves, sesion['num_opciones']))
+            self._resultados[sesion_id] = guardado
+        return sesion, matriz, guardado[1]
+
+    def reactivos(self):
+        """Una fila por pregunta con respuestas, dificultad, discriminación y diagnóstico."""
+        filas = []
+        with self._lock:
+            for sesion_id in self._catalogo:
+                calculo = self._estadisticas(sesion_id)
+                if calculo is None:
+                    continue
+                sesion, matriz, (dificultad, discriminacion, _) = calculo
+                for i, ejercicio in enumerate(sesion['ejercicios']):
+                    filas.append((
+                        sesion_id, i + 1, ejercicio['pregunta'], len(matriz),
+                        round(float(dificultad[i]), 3), round(float(discriminacion[i]), 3),
+                        diagnostico_reactivo(dificultad[i], discriminacion[i]),
+                    ))
+        return pd.DataFrame(filas, columns=COLUMNAS_REACTIVOS)
+
+    def distractores(self, sesion_id):
+        """Porcentaje de intentos que eligió cada opción de cada pregunta de la sesión.
+
+        En los ejercicios generados las opciones cambian con la variante, así que
+        solo se distingue la respuesta correcta de las demás.
+        """
+        with self._lock:
+            calculo = self._estadisticas(sesion_id)
+        if calculo is None:
+            return pd.DataFrame(columns=['numero', 'opcion', 'correcta', 'eligieron_pct'])
+        sesion, matriz, (dificultad, _, frecuencias) = calculo
+        filas = []
+        for i, ejercicio in enumerate(sesion['ejercicios']):
+            if 'variantes' in ejercicio:
+                aciertos = int(round(dificultad[i] * len(matriz)))
+                filas.append((i + 1, "(la correcta de su variante)", True, aciertos))
+                filas.append((i + 1, "(otra opción)", False, len(matriz) - aciertos - frecuencias[i, 0]))
+            else:
+                for j, opcion in enumerate(ejercicio['opciones']):
+                    filas.append((i + 1, opcion, j == ejercicio['indice_correcta'], frecuencias[i, j + 1]))
+            if frecuencias[i, 0]:
+                filas.append((i + 1, "(sin responder)", False, frecuencias[i, 0]))
+        df = pd.DataFrame(filas, columns=['numero', 'opcion', 'correcta', 'conteo'])
+        df['eligieron_pct'] = (df['conteo'] * 100.0 / len(matriz)).round(1)
+        return df.drop(columns='conteo')
@@ -0,0 +1,150 @@
+"""Búsqueda de temas en todo el curso con un índice invertido.
+
+Al compilar una sesión se parte en documentos cortos (el título, cada apartado
+de la teoría, cada pregunta y cada explicación) y se cuentan sus términos ya
+normalizados; eso queda en la caché compilada. El índice une esos conteos en
+término -> [(documento, peso)], así que una búsqueda solo consulta las listas
+de los términos pedidos y nunca recorre el contenido.
+"""
+import math
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+
+# ==========================================
+# 1. NORMALIZACIÓN
+# ==========================================
+PALABRAS_VACIAS = set("""
+a al algo como con cual cuales cuando cuanto de del donde el ella en entre es esta este
+esto hay la las lo los mas me mi muy no o para pero por que se si sin son su sus te tu
+un una uno unos y ya cite start
+""".split())
+LONGITUD_MINIMA = 2
+
+
+def normalizar(texto):
+    """Términos del texto: minúsculas, sin acentos ni signos y sin palabras vacías.
+
+    El plural se reduce al singular de forma sencilla ("fracciones" -> "fraccion",
+    "números" -> "numero") para que ambos coincidan.
+    """
+    texto = unicodedata.normalize("NFKD", str(texto).lower())
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    terminos = []
+    for palabra in re.findall(r"[a-z0-9ñ]+", texto):
+        if palabra in PALABRAS_VACIAS or len(palabra) < LONGITUD_MINIMA:
+            continue
+        if len(palabra) > 3 and palabra.endswith("s"):
+            palabra = palabra[:-1]
+        # "fraccione(s)" -> "fraccion"; se aplica igual al singular para que coincidan.
+        if len(palabra) > 4 and palabra.endswith("e") and palabra[-2] in "nrld":
+            palabra = palabra[:-1]
+        terminos.append(palabra)
+    return terminos
+
+
+# ==========================================
+# 2. DOCUMENTOS DE UNA SESIÓN
+# ==========================================
+# Un término en el título pesa más que uno en la teoría o en una explicación.
+PESO_CAMPO = {"titulo": 3.0, "pregunta": 2.0, "teoria": 1.0, "explicacion": 1.0}
+
+
+def _apartados(teoria):
+    """Apartados de la teoría: cada encabezado markdown con su texto."""
+    apartados, actual = [], []
+    for linea in teoria.splitlines():
+        linea = linea.strip()
+        if linea.startswith("#") and actual:
+            apartados.append(actual)
+            actual = []
+        if linea:
+            actual.append(linea)
+    if actual:
+        apartados.append(actual)
+    return apartados
+
+
+def _resumen(texto, largo=140):
+    texto = re.sub(r"\[cite[^\]]*\]|[#*]", "", texto).strip()
+    return texto if len(texto) <= largo else texto[:largo - 1].rstrip() + "…"
+
+
+def documentos_de_sesion(sesion):
+    """Documentos buscables de una sesión compilada.
+
+    Cada uno es un dict con 'campo', 'ejercicio' (número de ejercicio o None),
+    'resumen' (texto corto para mostrar) y 'terminos' (conteo de términos).
+    """
+    documentos = [{"campo": "titulo", "ejercicio": None, "resumen": sesion["titulo"], "texto": sesion["titulo"]}]
+    for apartado in _apartados(sesion["teoria"]):
+        documentos.append({"campo": "teoria", "ejercicio": None, "resumen": _resumen(apartado[0]), "texto": " ".join(apartado)})
+    for numero, ejercicio in enumerate(sesion["ejercicios"], start=1):
+        for campo in ("pregunta", "explicacion"):
+            documentos.append({"campo": campo, "ejercicio": numero, "resumen": _resumen(ejercicio[campo]), "texto": ejercicio[campo]})
+    for documento in documentos:
+        documento["terminos"] = dict(Counter(normalizar(documento.pop("texto"))))
+    return documentos
+
+
+# ==========================================
+# 3. ÍNDICE INVERTIDO
+# ==========================================
+class IndiceBusqueda:
+    """Índice invertido de todo el curso con ranking tf-idf.
+
+    Se construye una vez a partir de los documentos que dejó el compilador en
+    cada sesión. El peso de cada aparición (frecuencia, campo e idf) se calcula
+    al construir, así que buscar es sumar listas ya ponderadas.
+    """
+
+    def __init__(self, catalogo):
+        self._documentos = []
+        apariciones = {}
+        for sesion_id in catalogo:
+            for documento in catalogo[sesion_id]["documentos"]:
+                numero = len(self._documentos)
+                self._documentos.append(dict(documento, sesion_id=sesion_id))
+                for termino, veces in documento["terminos"].items():
+                    apariciones.setdefault(termino, []).append((numero, veces * PESO_CAMPO[documento["campo"]]))
+        total = len(self._documentos)
+        self._listas = {
+            termino: [(numero, peso * math.log(1 + total / len(lista))) for numero, peso in lista]
+            for termino, lista in apariciones.items()
+        }
+        # Vocabulario ordenado para completar el último término como prefijo ("factoriz").
+        self._vocabulario = sorted(self._listas)
+
+    def _terminos_prefijo(self, prefijo, maximo=20):
+        inicio = bisect_left(self._vocabulario, prefijo)
+        terminos = []
+        for termino in self._vocabulario[inicio:inicio + maximo]:
+            if not termino.startswith(prefijo):
+                break
+            terminos.append(termino)
+        return terminos
+
+    def buscar(self, consulta, limite=10):
+        """Documentos que contienen los términos de la consulta, del más relevante al menos.
+
+        El último término también se busca como prefijo, para encontrar mientras
+        se escribe. Cada resultado es un dict con 'sesion_id', 'campo',
+        'ejercicio', 'resumen' y 'puntaje'.
+        """
+        terminos = normalizar(consulta)
+        if not terminos:
+            return []
+        puntajes = {}
+        for i, termino in enumerate(terminos):
+            variantes = {termino}
+            if i == len(terminos) - 1:
+                variantes.update(self._terminos_prefijo(termino))
+            for variante in variantes:
+                for numero, peso in self._listas.get(variante, ()):
+                    puntajes[numero] = puntajes.get(numero, 0.0) + peso
+        mejores = sorted(puntajes.items(), key=lambda par: par[1], reverse=True)[:limite]
+        return [
+            {**{k: v for k, v in self._documentos[n].items() if k != "terminos"}, "puntaje": round(p, 3)}
+            for n, p in mejores
+        ]
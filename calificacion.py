@@ -0,0 +1,283 @@
+"""Motor de calificación vectorizado: intentos en línea, recalificación masiva y hojas en papel.
+
+Las respuestas de un intento son los índices de las opciones elegidas. Un lote
+de intentos de la misma sesión es una matriz (intentos x preguntas) y se
+califica contra el arreglo de claves de la sesión en una sola operación.
+"""
+import base64
+import hashlib
+
+import numpy as np
+
+# ==========================================
+# 1. RESPUESTAS GUARDADAS
+# ==========================================
+# Cada intento guarda sus respuestas en un solo texto corto:
+#   "n" + base64url( [número de preguntas] + un nibble por pregunta )
+# El nibble es el índice de la opción elegida; 0xF es "sin respuesta" (y relleno
+# cuando el número de preguntas es impar). Diez preguntas ocupan 9 caracteres.
+# Si la sesión tiene ejercicios generados, el prefijo es "v" y después de los
+# nibbles va un byte por pregunta con la variante que se mostró.
+# Con el prefijo en mayúscula ("N", "V") el texto termina con la huella del
+# contenido de la sesión (ver huella_contenido): así se reconoce un intento
+# respondido con otra versión de las preguntas aunque tenga el mismo número.
+# El prefijo distingue este formato del anterior ("0,2,1"), que se sigue leyendo.
+SIN_RESPUESTA = -1
+PREFIJO_COMPACTO = "n"
+PREFIJO_VARIANTES = "v"
+PREFIJO_COMPACTO_HUELLA = "N"
+PREFIJO_VARIANTES_HUELLA = "V"
+# prefijo -> (guarda variantes, guarda huella)
+FORMATOS_COMPACTOS = {
+    PREFIJO_COMPACTO: (False, False),
+    PREFIJO_VARIANTES: (True, False),
+    PREFIJO_COMPACTO_HUELLA: (False, True),
+    PREFIJO_VARIANTES_HUELLA: (True, True),
+}
+MAX_VARIANTES = 256
+NIBBLE_VACIO = 0xF
+MAX_PREGUNTAS = 255
+BYTES_HUELLA = 4
+
+
+def huella_contenido(ids):
+    """Huella corta de las preguntas de una sesión: hash de sus ids, en orden.
+
+    Cambia si cambia el texto u opciones de una pregunta, su orden o la versión
+    de un generador (ver contenido.id_pregunta); corregir una clave no la cambia.
+    """
+    return hashlib.sha256("\x1f".join(ids).encode("utf-8")).digest()[:BYTES_HUELLA]
+
+
+def codificar_respuestas(elegidas, variantes=None, huella=None):
+    """Texto compacto que se guarda con el intento (ver el formato arriba).
+
+    `variantes` es el índice de variante de cada pregunta; si todas son 0 (o no
+    se da) se usa el formato sin variantes. `huella` es la de la sesión que se
+    respondió (sesion['huella']).
+    """
+    elegidas = np.asarray(elegidas, dtype=np.int16)
+    if len(elegidas) > MAX_PREGUNTAS or (elegidas >= NIBBLE_VACIO).any():
+        raise ValueError("demasiadas preguntas u opciones para la codificación compacta")
+    prefijo, extra = PREFIJO_COMPACTO, b""
+    if variantes is not None and np.any(variantes):
+        variantes = np.asarray(variantes, dtype=np.int64)
+        if len(variantes) != len(elegidas) or (variantes >= MAX_VARIANTES).any() or (variantes < 0).any():
+            raise ValueError("variantes fuera de rango para la codificación compacta")
+        prefijo, extra = PREFIJO_VARIANTES, variantes.astype(np.uint8).tobytes()
+    if huella is not None:
+        prefijo, extra = prefijo.upper(), extra + _validar_huella(huella)
+    nibbles = np.where(elegidas < 0, NIBBLE_VACIO, elegidas).astype(np.uint8)
+    if len(nibbles) % 2:
+        nibbles = np.append(nibbles, np.uint8(NIBBLE_VACIO))
+    empacado = (nibbles[0::2] << 4) | nibbles[1::2]
+    crudo = bytes([len(elegidas)]) + empacado.tobytes() + extra
+    return prefijo + base64.urlsafe_b64encode(crudo).rstrip(b"=").decode("ascii")
+
+
+def _validar_huella(huella):
+    if len(huella) != BYTES_HUELLA:
+        raise ValueError(f"la huella del contenido debe tener {BYTES_HUELLA} bytes")
+    return bytes(huella)
+
+
+def _ancho(num_preguntas, con_variantes, con_huella):
+    """Bytes de un intento codificado: conteo + nibbles (+ un byte por variante) (+ huella)."""
+    return 1 + (num_preguntas + 1) // 2 + (num_preguntas if con_variantes else 0) + (BYTES_HUELLA if con_huella else 0)
+
+
+def _bytes_compactos(texto):
+    cuerpo = texto[1:]
+    return base64.urlsafe_b64decode(cuerpo + "=" * (-len(cuerpo) % 4))
+
+
+def _desempacar(empacado, num_preguntas):
+    """Nibbles (uint8, ... x bytes) -> índices int8 (... x preguntas), 0xF como -1."""
+    nibbles = np.stack([empacado >> 4, empacado & 0xF], axis=-1).reshape(*empacado.shape[:-1], -1)
+    nibbles = nibbles[..., :num_preguntas].astype(np.int8)
+    nibbles[nibbles == NIBBLE_VACIO] = SIN_RESPUESTA
+    return nibbles
+
+
+def decodificar_respuestas(texto):
+    """Índices elegidos a partir del texto guardado (lista vacía si no hay).
+
+    Acepta el formato compacto y el anterior separado por comas. Lanza ValueError
+    si el texto está dañado.
+    """
+    texto = str(texto).strip()
+    if not texto:
+        return []
+    if texto[:1] in FORMATOS_COMPACTOS:
+        try:
+            crudo = _bytes_compactos(texto)
+        except ValueError:
+            raise ValueError(f"respuestas dañadas: {texto!r}") from None
+        if not crudo or len(crudo) != _ancho(crudo[0], *FORMATOS_COMPACTOS[texto[0]]):
+            raise ValueError(f"respuestas dañadas: {texto!r}")
+        return _desempacar(np.frombuffer(crudo[1:1 + (crudo[0] + 1) // 2], dtype=np.uint8), crudo[0]).tolist()
+    return [int(i) for i in texto.split(",")]
+
+
+def matriz_respuestas(textos, num_preguntas, huella=None, exigir_huella=False):
+    """Respuestas de muchos intentos de una sesión, listas para calificar juntas.
+
+    Devuelve (matriz, validas, variantes): la matriz int8 (intentos x preguntas)
+    de opciones elegidas, la máscara de intentos utilizables y la matriz de
+    variantes mostradas (0 donde no se guardó variante). Un intento no se puede
+    usar si no guardó respuestas, si tiene otro número de preguntas que la
+    sesión actual o si guardó una huella distinta de `huella` (se respondió con
+    otra versión). Con `exigir_huella` tampoco se usan los intentos que no
+    guardaron huella: no hay forma de saber contra qué versión se respondieron.
+    Los textos compactos se decodifican juntos: un solo búfer por formato y
+    operaciones de NumPy, sin recorrer pregunta por pregunta.
+    """
+    matriz = np.full((len(textos), num_preguntas), SIN_RESPUESTA, dtype=np.int8)
+    variantes = np.zeros((len(textos), num_preguntas), dtype=np.int64)
+    validas = np.zeros(len(textos), dtype=bool)
+    # prefijo -> (filas, bloques de bytes)
+    compactos = {prefijo: ([], []) for prefijo in FORMATOS_COMPACTOS}
+    for fila, texto in enumerate(textos):
+        texto = str(texto).strip()
+        try:
+            if texto[:1] in compactos:
+                con_variantes, con_huella = FORMATOS_COMPACTOS[texto[0]]
+                crudo = _bytes_compactos(texto)
+                if len(crudo) != _ancho(num_preguntas, con_variantes, con_huella) or crudo[0] != num_preguntas:
+                    continue
+                if con_huella and huella is not None and crudo[-BYTES_HUELLA:] != huella:
+                    continue
+                if not con_huella and exigir_huella:
+                    continue
+                compactos[texto[0]][0].append(fila)
+                compactos[texto[0]][1].append(crudo)
+                continue
+            if exigir_huella:
+                continue
+            elegidas = decodificar_respuestas(texto)
+        except ValueError:
+            continue
+        if len(elegidas) == num_preguntas:
+            matriz[fila] = elegidas
+            validas[fila] = True
+    nibbles = (num_preguntas + 1) // 2
+    for prefijo, (filas, bloques) in compactos.items():
+        if not bloques:
+            continue
+        crudo = np.frombuffer(b"".join(bloques), dtype=np.uint8).reshape(len(bloques), -1)
+        matriz[filas] = _desempacar(crudo[:, 1:1 + nibbles], num_preguntas)
+        if FORMATOS_COMPACTOS[prefijo][0]:
+            variantes[filas] = crudo[:, 1 + nibbles:1 + nibbles + num_preguntas]
+        validas[filas] = True
+    return matriz, validas, variantes
+
+
+def claves_de_variantes(claves_variantes, variantes):
+    """Clave de cada pregunta de cada intento según la variante que se le mostró.
+
+    `claves_variantes` es la tabla (preguntas x variantes) de la sesión compilada
+    y `variantes` la matriz (intentos x preguntas) de matriz_respuestas.
+    """
+    claves_variantes = np.asarray(claves_variantes)
+    variantes = np.minimum(variantes, claves_variantes.shape[1] - 1)
+    return claves_variantes[np.arange(claves_variantes.shape[0]), variantes]
+
+
+# ==========================================
+# 2. CALIFICACIÓN
+# ==========================================
+def calificar(claves, respuestas):
+    """Califica uno o muchos intentos contra las claves de la sesión.
+
+    `respuestas` puede ser un vector (un intento) o una matriz (un intento por
+    fila); `claves` un vector común o una matriz con la clave de cada intento
+    (ver claves_de_variantes). Devuelve (puntajes, aciertos), donde `aciertos`
+    es booleano con la misma forma que `respuestas`.
+    """
+    respuestas = np.asarray(respuestas, dtype=np.int8)
+    aciertos = respuestas == np.asarray(claves, dtype=np.int8)
+    return aciertos.sum(axis=-1), aciertos
+
+
+def recalificar_sesion(almacen, sesion_id, claves_variantes, huella):
+    """Vuelve a calificar todos los intentos guardados de una sesión con las claves actuales.
+
+    `claves_variantes` es la tabla de claves de la sesión compilada y `huella` la
+    de su contenido. Solo se recalifican los intentos que guardaron esa misma
+    huella: un intento de otra versión (o sin huella) se deja como está. Se
+    califica todo en una pasada vectorizada y solo los puntajes que cambian se
+    escriben de vuelta, en una sola operación del almacén.
+    """
+    intentos = almacen.respuestas_de_sesion(sesion_id)
+    matriz, validas, variantes = matriz_respuestas(
+        [i['respuestas'] for i in intentos], len(claves_variantes), huella, exigir_huella=True
+    )
+    puntajes, _ = calificar(claves_de_variantes(claves_variantes, variantes), matriz)
+    actuales = np.array([int(i['puntaje'] or 0) for i in intentos], dtype=np.int64)
+    cambian = np.flatnonzero(validas & (puntajes != actuales))
+    cambios = [(intentos[k]['posicion'], int(puntajes[k])) for k in cambian]
+    if cambios:
+        almacen.actualizar_puntajes(cambios)
+    return {
+        "revisados": int(validas.sum()),
+        "corregidos": len(cambios),
+        "sin_respuestas": int(len(intentos) - validas.sum()),
+    }
+
+
+# ==========================================
+# 3. HOJAS DE RESPUESTAS EN PAPEL
+# ==========================================
+# En papel la opción se anota con letra (A, B, C...) o con número (1, 2, 3...).
+# Una celda vacía o con "-" es pregunta sin contestar.
+LETRAS_OPCIONES = "ABCDEFGHIJKLMNO"
+OPCION_INVALIDA = -2
+VALORES_HOJA = {"": SIN_RESPUESTA, "-": SIN_RESPUESTA}
+VALORES_HOJA.update({letra: i for i, letra in enumerate(LETRAS_OPCIONES)})
+VALORES_HOJA.update({str(i + 1): i for i in range(len(LETRAS_OPCIONES))})
+
+
+def opciones_de_hoja(textos):
+    """Matriz int8 de opciones elegidas a partir de las celdas de texto de las hojas.
+
+    Las celdas que no se entienden quedan como OPCION_INVALIDA. Solo se traducen
+    los valores distintos (unos cuantos) y el resto es indexar con NumPy.
+    """
+    textos = np.char.upper(np.char.strip(np.asarray(textos, dtype=str)))
+    distintos, inverso = np.unique(textos, return_inverse=True)
+    valores = np.array([VALORES_HOJA.get(t, OPCION_INVALIDA) for t in distintos], dtype=np.int8)
+    return valores[inverso].reshape(textos.shape)
+
+
+def codificar_lote(matriz, huella=None):
+    """codificar_respuestas para muchos intentos a la vez (sin variantes)."""
+    matriz = np.asarray(matriz, dtype=np.int16)
+    num_preguntas = matriz.shape[1]
+    if num_preguntas > MAX_PREGUNTAS or (matriz >= NIBBLE_VACIO).any():
+        raise ValueError("demasiadas preguntas u opciones para la codificación compacta")
+    nibbles = np.where(matriz < 0, NIBBLE_VACIO, matriz).astype(np.uint8)
+    if num_preguntas % 2:
+        nibbles = np.column_stack([nibbles, np.full(len(nibbles), NIBBLE_VACIO, dtype=np.uint8)])
+    columnas = [np.full(len(nibbles), num_preguntas, dtype=np.uint8), (nibbles[:, 0::2] << 4) | nibbles[:, 1::2]]
+    prefijo = PREFIJO_COMPACTO
+    if huella is not None:
+        prefijo = PREFIJO_COMPACTO_HUELLA
+        columnas.append(np.tile(np.frombuffer(_validar_huella(huella), dtype=np.uint8), (len(nibbles), 1)))
+    crudo = np.column_stack(columnas)
+    return [prefijo + base64.urlsafe_b64encode(fila.tobytes()).rstrip(b"=").decode("ascii") for fila in crudo]
+
+
+def calificar_hojas(textos, sesion):
+    """Califica de una vez las hojas en papel de una sesión compilada.
+
+    `textos` es la matriz (hojas x preguntas) de celdas tal como vienen del CSV.
+    En papel se imprime la variante 0 de los ejercicios generados, así que se
+    califica contra `sesion['claves']`. Devuelve (puntajes, matriz, validas): una
+    hoja no es válida si marca una opción que la pregunta no tiene.
+    """
+    num_opciones = np.array([len(e["opciones"]) for e in sesion["ejercicios"]])
+    matriz = opciones_de_hoja(textos)
+    validas = ((matriz >= SIN_RESPUESTA) & (matriz < num_opciones)).all(axis=1)
+    matriz[~validas] = SIN_RESPUESTA
+    puntajes, _ = calificar(sesion["claves"], matriz)
+    return puntajes, matriz, validas
@@ -0,0 +1,315 @@
+"""Contenido del curso: registro de sesiones, compilador y carga perezosa.
+
+Cada sesión vive en `contenido/<sesion_id>.json` y `contenido/indice.json` lista
+las sesiones en orden con su título. El menú solo necesita el índice; el cuerpo
+de una sesión (teoría y ejercicios) se lee hasta que alguien la abre.
+
+Al cargarse, cada sesión pasa por el compilador: se valida, cada pregunta recibe
+un id estable y se agregan las claves de respuesta como arreglos de enteros.
+Los ejercicios con "generador" se expanden a un banco de variantes (ver
+generadores.py); lo que se guarda con cada intento dice qué variante se mostró.
+Para revisar todo el contenido de una vez: `python contenido.py`.
+"""
+import hashlib
+import json
+import os
+import pickle
+import sys
+import threading
+from collections.abc import Mapping
+
+import numpy as np
+
+from busqueda import documentos_de_sesion
+from calificacion import huella_contenido
+from generadores import GENERADORES, VERSIONES_GENERADORES, generar_banco
+
+# ==========================================
+# 1. UBICACIÓN DE LOS ARCHIVOS
+# ==========================================
+DIRECTORIO_BASE = os.path.dirname(os.path.abspath(__file__))
+DIRECTORIO_CONTENIDO = os.path.join(DIRECTORIO_BASE, "contenido")
+# Versión ya procesada de cada sesión, identificada por el hash de su JSON.
+DIRECTORIO_COMPILADO = os.path.join(DIRECTORIO_BASE, ".contenido_compilado")
+ARCHIVO_INDICE = "indice.json"
+# Cambia cuando cambia la forma de la sesión compilada o la normalización de
+# busqueda.py (invalida la caché en disco). La versión de cada generador entra
+# aparte en la huella, con VERSIONES_GENERADORES.
+VERSION_COMPILADOR = "5"
+
+
+# ==========================================
+# 2. COMPILADOR DE SESIONES
+# ==========================================
+CAMPOS_SESION = {"titulo", "teoria", "ejercicios"}
+CAMPOS_EJERCICIO = {"pregunta", "opciones", "correcta", "explicacion"}
+CAMPOS_GENERADO = {"generador", "semilla"}
+CAMPOS_GENERADO_OPCIONALES = {"parametros"}
+
+
+class ErrorContenido(ValueError):
+    """Una sesión del curso está mal formada."""
+
+
+def _rechazar_duplicados(pares):
+    """object_pairs_hook de json: una clave repetida es un error, no se sobrescribe."""
+    objeto = {}
+    for clave, valor in pares:
+        if clave in objeto:
+            raise ErrorContenido(f"clave repetida '{clave}'")
+        objeto[clave] = valor
+    return objeto
+
+
+def id_pregunta(ejercicio):
+    """Id estable de la pregunta: hash de su texto y opciones.
+
+    No incluye la respuesta correcta, así que corregir una clave conserva el id
+    (y con él el historial de respuestas de esa pregunta). En un ejercicio
+    generado, el hash es de su declaración (generador, semilla y parámetros) y
+    de la versión del generador (ver generadores.VERSIONES_GENERADORES): con otra
+    versión el banco ya no es el mismo y el id cambia.
+    """
+    if "generador" in ejercicio:
+        declaracion = {c: ejercicio.get(c) for c in sorted(CAMPOS_GENERADO | CAMPOS_GENERADO_OPCIONALES)}
+        declaracion["version"] = VERSIONES_GENERADORES[ejercicio["generador"]]
+        texto = json.dumps(declaracion, sort_keys=True)
+    else:
+        texto = "\x1f".join([ejercicio["pregunta"], *ejercicio["opciones"]])
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()[:12]
+
+
+def _expandir_generado(ejercicio):
+    """Valida un ejercicio con generador y le agrega su banco de variantes.
+
+    La variante 0 queda además en los campos de un ejercicio fijo, de modo que
+    quien no pida una variante en particular ve siempre la misma.
+    """
+    faltan = CAMPOS_GENERADO - ejercicio.keys()
+    if faltan:
+        raise ErrorContenido(f"faltan los campos {sorted(faltan)}")
+    sobran = ejercicio.keys() - CAMPOS_GENERADO - CAMPOS_GENERADO_OPCIONALES
+    if sobran:
+        raise ErrorContenido(f"campos desconocidos {sorted(sobran)}")
+    if ejercicio["generador"] not in GENERADORES:
+        raise ErrorContenido(f"generador desconocido {ejercicio['generador']!r} (hay: {sorted(GENERADORES)})")
+    if not isinstance(ejercicio["semilla"], int):
+        raise ErrorContenido("'semilla' debe ser un entero")
+    if not isinstance(ejercicio.get("parametros", {}), dict):
+        raise ErrorContenido("'parametros' debe ser un objeto")
+    try:
+        banco = generar_banco(ejercicio["generador"], ejercicio["semilla"], ejercicio.get("parametros"))
+    except (TypeError, ValueError) as e:
+        raise ErrorContenido(f"no se pudo generar '{ejercicio['generador']}': {e}") from None
+    ejercicio["variantes"] = banco
+    ejercicio["pregunta"] = banco["preguntas"][0]
+    ejercicio["opciones"] = banco["opciones"][0]
+    ejercicio["explicacion"] = banco["explicaciones"][0]
+    ejercicio["correcta"] = ejercicio["opciones"][banco["claves"][0]]
+
+
+def _validar_ejercicio(ejercicio):
+    if not isinstance(ejercicio, dict):
+        raise ErrorContenido("el ejercicio no es un objeto")
+    if "generador" in ejercicio:
+        _expandir_generado(ejercicio)
+        return
+    faltan = CAMPOS_EJERCICIO - ejercicio.keys()
+    if faltan:
+        raise ErrorContenido(f"faltan los campos {sorted(faltan)}")
+    sobran = ejercicio.keys() - CAMPOS_EJERCICIO
+    if sobran:
+        raise ErrorContenido(f"campos desconocidos {sorted(sobran)}")
+    opciones = ejercicio["opciones"]
+    if not isinstance(opciones, list) or len(opciones) < 2:
+        raise ErrorContenido("'opciones' debe ser una lista con al menos dos opciones")
+    if not all(isinstance(o, str) and o.strip() for o in opciones):
+        raise ErrorContenido("todas las opciones deben ser texto no vacío")
+    if len(set(opciones)) != len(opciones):
+        raise ErrorContenido("hay opciones repetidas")
+    if ejercicio["correcta"] not in opciones:
+        raise ErrorContenido(f"la respuesta correcta {ejercicio['correcta']!r} no está entre las opciones")
+    for campo in ("pregunta", "explicacion"):
+        if not isinstance(ejercicio[campo], str) or not ejercicio[campo].strip():
+            raise ErrorContenido(f"'{campo}' debe ser texto no vacío")
+
+
+def compilar_sesion(sesion_id, crudo):
+    """Valida el JSON de una sesión y agrega ids y claves de respuesta.
+
+    Devuelve el dict de la sesión con, además:
+    - en cada ejercicio, `id` (ver id_pregunta) e `indice_correcta`;
+    - `ids`: lista de ids de pregunta en orden;
+    - `huella`: huella de `ids` que se guarda con cada intento (ver
+      calificacion.huella_contenido);
+    - `claves`: np.int8 con el índice de la opción correcta de cada pregunta;
+    - `num_opciones`: np.int8 con cuántas opciones tiene cada pregunta;
+    - `claves_variantes`: np.int8 (preguntas x variantes) con la clave de cada
+      variante; una pregunta fija repite su clave en todas las columnas;
+    - `num_variantes`: np.int16 con el tamaño del banco de cada pregunta (1 si es fija);
+    - `documentos`: partes buscables de la sesión con sus términos (ver busqueda.py).
+    Lanza ErrorContenido indicando la sesión y el ejercicio con el problema.
+    """
+    try:
+        sesion = json.loads(crudo, object_pairs_hook=_rechazar_duplicados)
+    except ErrorContenido as e:
+        raise ErrorContenido(f"{sesion_id}: {e}") from None
+    except ValueError as e:
+        raise ErrorContenido(f"{sesion_id}: JSON inválido ({e})") from None
+    if not isinstance(sesion, dict) or CAMPOS_SESION - sesion.keys():
+        raise ErrorContenido(f"{sesion_id}: la sesión debe tener {sorted(CAMPOS_SESION)}")
+    if not isinstance(sesion["ejercicios"], list) or not sesion["ejercicios"]:
+        raise ErrorContenido(f"{sesion_id}: la sesión no tiene ejercicios")
+    ids = []
+    for numero, ejercicio in enumerate(sesion["ejercicios"], start=1):
+        try:
+            _validar_ejercicio(ejercicio)
+        except ErrorContenido as e:
+            raise ErrorContenido(f"{sesion_id}, ejercicio {numero}: {e}") from None
+        ejercicio["id"] = id_pregunta(ejercicio)
+        ejercicio["indice_correcta"] = ejercicio["opciones"].index(ejercicio["correcta"])
+        ids.append(ejercicio["id"])
+    if len(set(ids)) != len(ids):
+        raise ErrorContenido(f"{sesion_id}: hay preguntas repetidas")
+    sesion["ids"] = ids
+    sesion["huella"] = huella_contenido(ids)
+    sesion["claves"] = np.array([e["indice_correcta"] for e in sesion["ejercicios"]], dtype=np.int8)
+    sesion["num_opciones"] = np.array([len(e["opciones"]) for e in sesion["ejercicios"]], dtype=np.int8)
+    sesion["num_variantes"] = np.array(
+        [len(e["variantes"]["claves"]) if "variantes" in e else 1 for e in sesion["ejercicios"]], dtype=np.int16
+    )
+    claves_variantes = np.repeat(sesion["claves"][:, None], sesion["num_variantes"].max(), axis=1)
+    for i, ejercicio in enumerate(sesion["ejercicios"]):
+        if "variantes" in ejercicio:
+            claves_variantes[i, :sesion["num_variantes"][i]] = ejercicio["variantes"]["claves"]
+    sesion["claves_variantes"] = claves_variantes
+    sesion["documentos"] = documentos_de_sesion(sesion)
+    return sesion
+
+
+def variante(ejercicio, indice):
+    """El ejercicio tal como se muestra en la variante `indice` (el mismo si es fijo)."""
+    if "variantes" not in ejercicio:
+        return ejercicio
+    banco = ejercicio["variantes"]
+    return dict(
+        ejercicio,
+        pregunta=banco["preguntas"][indice],
+        opciones=banco["opciones"][indice],
+        explicacion=banco["explicaciones"][indice],
+        indice_correcta=int(banco["claves"][indice]),
+    )
+
+
+def sortear_variantes(sesion, rng):
+    """Índice de variante para cada pregunta de la sesión (0 en las fijas)."""
+    return (rng.random(len(sesion["num_variantes"])) * sesion["num_variantes"]).astype(np.int64)
+
+
+# ==========================================
+# 3. CATÁLOGO PEREZOSO
+# ==========================================
+class CatalogoCurso(Mapping):
+    """Se usa como el antiguo diccionario CONTENIDO_CURSO, pero carga bajo demanda.
+
+    `len`, iterar y `titulo()` solo leen el índice. `catalogo[sesion_id]` lee esa
+    sesión: primero busca en memoria (validada contra la fecha y tamaño del
+    archivo), luego en la caché compilada en disco (por hash del contenido) y
+    solo como último recurso interpreta el JSON.
+    """
+
+    def __init__(self, directorio=DIRECTORIO_CONTENIDO, directorio_compilado=DIRECTORIO_COMPILADO):
+        self._directorio = directorio
+        self._directorio_compilado = directorio_compilado
+        self._lock = threading.Lock()
+        self._indice = None
+        self._firma_indice = None
+        self._sesiones = {}
+
+    def _firma(self, ruta):
+        estado = os.stat(ruta)
+        return (estado.st_mtime_ns, estado.st_size)
+
+    def _registro(self):
+        """Índice de sesiones: sesion_id -> {'titulo', 'archivo'}, en orden."""
+        ruta = os.path.join(self._directorio, ARCHIVO_INDICE)
+        firma = self._firma(ruta)
+        with self._lock:
+            if self._indice is None or firma != self._firma_indice:
+                with open(ruta, encoding="utf-8") as f:
+                    sesiones = json.load(f)["sesiones"]
+                self._indice = {s["id"]: s for s in sesiones}
+                self._firma_indice = firma
+            return self._indice
+
+    def _cargar(self, sesion_id):
+        ruta = os.path.join(self._directorio, self._registro()[sesion_id]["archivo"])
+        firma = self._firma(ruta)
+        en_memoria = self._sesiones.get(sesion_id)
+        if en_memoria and en_memoria[0] == firma:
+            return en_memoria[1]
+        with open(ruta, "rb") as f:
+            crudo = f.read()
+        versiones = json.dumps(VERSIONES_GENERADORES, sort_keys=True)
+        huella = hashlib.sha256(VERSION_COMPILADOR.encode() + versiones.encode() + crudo).hexdigest()[:16]
+        ruta_compilada = os.path.join(self._directorio_compilado, f"{sesion_id}-{huella}.pickle")
+        try:
+            with open(ruta_compilada, "rb") as f:
+                sesion = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            sesion = compilar_sesion(sesion_id, crudo)
+            if sesion["titulo"] != self.titulo(sesion_id):
+                raise ErrorContenido(f"{sesion_id}: el título no coincide con el de {ARCHIVO_INDICE}")
+            try:
+                os.makedirs(self._directorio_compilado, exist_ok=True)
+                temporal = f"{ruta_compilada}.{os.getpid()}.tmp"
+                with open(temporal, "wb") as f:
+                    pickle.dump(sesion, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temporal, ruta_compilada)
+            except OSError:
+                # Sin permiso de escritura: seguimos con la versión en memoria.
+                pass
+        self._sesiones[sesion_id] = (firma, sesion)
+        return sesion
+
+    def __getitem__(self, sesion_id):
+        if sesion_id not in self._registro():
+            raise KeyError(sesion_id)
+        return self._cargar(sesion_id)
+
+    def __iter__(self):
+        return iter(self._registro())
+
+    def __len__(self):
+        return len(self._registro())
+
+    def __contains__(self, sesion_id):
+        return sesion_id in self._registro()
+
+    def titulo(self, sesion_id):
+        """Título de la sesión sin cargar su contenido."""
+        return self._registro()[sesion_id]["titulo"]
+
+
+CONTENIDO_CURSO = CatalogoCurso()
+
+
+def compilar_todo(catalogo=CONTENIDO_CURSO):
+    """Compila todas las sesiones; devuelve la lista de errores encontrados."""
+    errores = []
+    for sesion_id in catalogo:
+        try:
+            catalogo[sesion_id]
+        except (ErrorContenido, OSError) as e:
+            errores.append(str(e))
+    return errores
+
+
+if __name__ == "__main__":
+    errores = compilar_todo()
+    for error in errores:
+        print(f"❌ {error}")
+    if errores:
+        sys.exit(1)
+    preguntas = sum(len(CONTENIDO_CURSO[s]["ejercicios"]) for s in CONTENIDO_CURSO)
+    print(f"✅ {len(CONTENIDO_CURSO)} sesiones y {preguntas} preguntas compiladas sin errores.")
@@ -0,0 +1,231 @@
+"""Contraseñas cifradas con scrypt y verificación en un grupo acotado de hilos.
+
+Se guarda "scrypt$<log2 N>$<r>$<p>$<sal>$<hash>" (sal y hash en base64). Las
+filas antiguas con la contraseña en texto plano se siguen aceptando y se
+cifran en el primer ingreso correcto; lo mismo pasa si el costo configurado
+subió desde que se cifró.
+
+scrypt es caro a propósito (~70 ms y 16 MB con el costo por omisión): una ola
+de ingresos al inicio de la clase no debe acaparar el CPU ni la memoria del
+servidor. Por eso las verificaciones pasan por un grupo fijo de hilos con una
+cola limitada; si la cola se llena se pide reintentar en vez de acumular.
+
+Además, aquí se firman los tokens de sesión que permiten recuperar el ingreso
+tras recargar la página sin volver a pedir la contraseña.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+
+from almacenamiento import ServicioNoDisponible
+
+# ==========================================
+# 1. CIFRADO
+# ==========================================
+ESQUEMA = "scrypt"
+COSTO_SCRYPT = 14  # N = 2**14
+BLOQUE_SCRYPT = 8
+PARALELISMO_SCRYPT = 1
+BYTES_SAL = 16
+BYTES_HASH = 32
+
+
+def _scrypt(password, sal, costo, r, p):
+    n = 2 ** costo
+    return hashlib.scrypt(
+        password.encode("utf-8"), salt=sal, n=n, r=r, p=p, dklen=BYTES_HASH,
+        maxmem=2 * 128 * r * n + 2 ** 20,
+    )
+
+
+def cifrar(password, costo=COSTO_SCRYPT):
+    """Texto que se guarda en la columna 'password'."""
+    sal = os.urandom(BYTES_SAL)
+    resumen = _scrypt(password, sal, costo, BLOQUE_SCRYPT, PARALELISMO_SCRYPT)
+    return "$".join([
+        ESQUEMA, str(costo), str(BLOQUE_SCRYPT), str(PARALELISMO_SCRYPT),
+        base64.b64encode(sal).decode("ascii"), base64.b64encode(resumen).decode("ascii"),
+    ])
+
+
+# Sin letras ni números que se confundan al dictarlos o copiarlos (0/O, 1/l/I).
+ALFABETO_TEMPORAL = "abcdefghjkmnpqrstuvwxyz23456789"
+LARGO_PASSWORD_TEMPORAL = 6
+
+
+def password_temporal(largo=LARGO_PASSWORD_TEMPORAL):
+    """Contraseña al azar para un alumno dado de alta por su docente."""
+    return "".join(secrets.choice(ALFABETO_TEMPORAL) for _ in range(largo))
+
+
+def verificar(password, guardado, costo=COSTO_SCRYPT):
+    """Compara la contraseña con lo guardado; devuelve (correcta, hay_que_recifrar).
+
+    Hay que recifrar si lo guardado está en texto plano o con otro costo.
+    """
+    guardado = str(guardado)
+    partes = guardado.split("$")
+    if len(partes) != 6 or partes[0] != ESQUEMA:
+        # Fila anterior al cifrado: texto plano.
+        correcta = hmac.compare_digest(guardado.encode("utf-8"), password.encode("utf-8"))
+        return correcta, correcta
+    try:
+        costo_guardado, r, p = int(partes[1]), int(partes[2]), int(partes[3])
+        sal, esperado = base64.b64decode(partes[4]), base64.b64decode(partes[5])
+    except ValueError:
+        return False, False
+    correcta = hmac.compare_digest(_scrypt(password, sal, costo_guardado, r, p), esperado)
+    return correcta, correcta and costo_guardado != costo
+
+
+# ==========================================
+# 2. GRUPO DE VERIFICACIÓN
+# ==========================================
+HILOS_VERIFICACION = 2
+MAX_VERIFICACIONES_EN_COLA = 64
+ESPERA_VERIFICACION_SEGUNDOS = 30
+
+
+class VerificacionSaturada(ServicioNoDisponible):
+    """Hay demasiados ingresos esperando verificación; conviene reintentar."""
+
+
+class VerificadorCredenciales:
+    """Ejecuta cifrado y verificación en `hilos` hilos como máximo.
+
+    Los hilos de Streamlit que atienden a cada alumno solo esperan el resultado;
+    hashlib.scrypt suelta el GIL, así que mientras tanto las demás sesiones siguen
+    respondiendo. Como mucho `max_en_cola` operaciones esperan turno.
+    """
+
+    def __init__(self, hilos=HILOS_VERIFICACION, costo=COSTO_SCRYPT, max_en_cola=MAX_VERIFICACIONES_EN_COLA,
+                 espera=ESPERA_VERIFICACION_SEGUNDOS):
+        self.costo = costo
+        self._espera = espera
+        self._grupo = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="verificador")
+        self._cupo = threading.BoundedSemaphore(max_en_cola)
+
+    def _ejecutar(self, funcion, *args):
+        if not self._cupo.acquire(blocking=False):
+            raise VerificacionSaturada("demasiados ingresos al mismo tiempo")
+        try:
+            return self._grupo.submit(funcion, *args).result(timeout=self._espera)
+        except FuturesTimeoutError:
+            raise VerificacionSaturada("la verificación tardó demasiado") from None
+        finally:
+            self._cupo.release()
+
+    def cifrar(self, password):
+        return self._ejecutar(cifrar, password, self.costo)
+
+    def cifrar_varios(self, passwords):
+        """Cifra una lista de contraseñas (p. ej. una lista de grupo) usando todos los hilos.
+
+        Cuenta como un solo lugar de la cola, pero los ingresos que lleguen mientras
+        tanto esperan turno detrás de estas contraseñas.
+        """
+        if not self._cupo.acquire(blocking=False):
+            raise VerificacionSaturada("demasiados ingresos al mismo tiempo")
+        try:
+            futuros = [self._grupo.submit(cifrar, password, self.costo) for password in passwords]
+            return [futuro.result() for futuro in futuros]
+        finally:
+            self._cupo.release()
+
+    def verificar(self, password, guardado):
+        """(correcta, nuevo_cifrado): `nuevo_cifrado` no es None si hay que migrar la fila."""
+        def tarea():
+            correcta, recifrar = verificar(password, guardado, self.costo)
+            return correcta, cifrar(password, self.costo) if recifrar else None
+        return self._ejecutar(tarea)
+
+
+# ==========================================
+# 3. TOKENS DE SESIÓN
+# ==========================================
+# Un token es "<datos>.<firma>" en base64 url-safe: los datos son el id, el
+# nombre, la fecha de vencimiento y la generación del ingreso, y la firma es su
+# HMAC-SHA256 con la clave del servidor. Validarlo no consulta el almacén.
+# El token viaja en la URL y queda en el historial del navegador: al cerrar
+# sesión se sube la generación del alumno y todos sus tokens anteriores dejan de
+# servir. La vida es corta (una jornada de clase, no un día entero) porque quien
+# cierra la pestaña sin cerrar sesión deja el suyo vigente hasta que vence.
+HORAS_TOKEN_SESION = 2
+
+
+def _b64(datos):
+    return base64.urlsafe_b64encode(datos).rstrip(b"=").decode("ascii")
+
+
+def _desde_b64(texto):
+    return base64.urlsafe_b64decode(texto + "=" * (-len(texto) % 4))
+
+
+class FirmadorSesiones:
+    """Emite, valida y revoca tokens de sesión firmados que caducan.
+
+    Sin `clave` se usa una aleatoria del proceso: los tokens sobreviven a una
+    recarga de la página, pero no a un reinicio del servidor. Las generaciones
+    (revocaciones) viven en memoria; con una `clave` fija, un reinicio deja
+    vigentes los tokens de generación 0 que no hayan vencido.
+    """
+
+    def __init__(self, clave=None, horas=HORAS_TOKEN_SESION):
+        self._clave = clave.encode("utf-8") if clave else os.urandom(32)
+        self.duracion = int(horas * 3600)
+        self._lock = threading.Lock()
+        # usuario_id -> generación vigente (0 si nunca cerró sesión)
+        self._generaciones = {}
+
+    def _firma(self, datos):
+        return hmac.new(self._clave, datos, hashlib.sha256).digest()
+
+    def emitir(self, usuario_id, nombre, ahora=None):
+        ahora = time.time() if ahora is None else ahora
+        datos = json.dumps(
+            {"u": int(usuario_id), "n": nombre, "v": int(ahora) + self.duracion,
+             "g": self._generaciones.get(int(usuario_id), 0)},
+            ensure_ascii=False, separators=(",", ":"),
+        ).encode("utf-8")
+        return _b64(datos) + "." + _b64(self._firma(datos))
+
+    def validar(self, token, ahora=None):
+        """Dict con 'usuario_id', 'nombre' y 'vence', o None si el token no sirve.
+
+        No sirve si está alterado, si venció o si el alumno cerró sesión después
+        de emitirlo.
+        """
+        ahora = time.time() if ahora is None else ahora
+        try:
+            datos_b64, firma_b64 = str(token).split(".")
+            datos, firma = _desde_b64(datos_b64), _desde_b64(firma_b64)
+        except ValueError:
+            return None
+        if not hmac.compare_digest(firma, self._firma(datos)):
+            return None
+        try:
+            carga = json.loads(datos)
+            sesion = {"usuario_id": int(carga["u"]), "nombre": str(carga["n"]), "vence": int(carga["v"])}
+            generacion = int(carga["g"])
+        except (ValueError, KeyError, TypeError):
+            return None
+        if generacion != self._generaciones.get(sesion["usuario_id"], 0):
+            return None
+        return sesion if sesion["vence"] > ahora else None
+
+    def revocar(self, usuario_id):
+        """Invalida todos los tokens emitidos hasta ahora para el alumno."""
+        with self._lock:
+            self._generaciones[int(usuario_id)] = self._generaciones.get(int(usuario_id), 0) + 1
+
+    def por_renovar(self, sesion, ahora=None):
+        """True si ya pasó más de la mitad de la vida del token."""
+        ahora = time.time() if ahora is None else ahora
+        return sesion["vence"] - ahora < self.duracion / 2
@@ -0,0 +1,138 @@
+"""Generadores de ejercicios numéricos con variantes.
+
+Un ejercicio del contenido puede declararse como
+    {"generador": "porcentaje", "semilla": 7, "parametros": {...}}
+en lugar de tener pregunta y opciones fijas. Al compilar la sesión se produce un
+banco de variantes de una sola vez: los números de todas las variantes se
+calculan juntos con NumPy, a partir de la semilla, así que el banco es siempre
+el mismo. Mostrar una variante nueva es solo elegir un índice del banco.
+"""
+import zlib
+
+import numpy as np
+
+# ==========================================
+# 1. GENERADORES
+# ==========================================
+# Cada generador recibe un np.random.Generator y cuántas variantes producir, y
+# devuelve (preguntas, opciones, explicaciones, validas). En `opciones` (una fila
+# por variante) la correcta va primero; `validas` descarta las filas que no sirven.
+TAMANO_BANCO = 64
+NUM_OPCIONES = 3
+
+
+def _divisibilidad(rng, cantidad, minimo=100, maximo=999):
+    divisores = np.array([2, 3, 4, 5, 6, 7, 8, 9, 11])
+    d = rng.choice(divisores, cantidad)
+    k = rng.integers(-(-minimo // d), maximo // d + 1)
+    numero = d * k
+    no_divide = numero[:, None] % divisores[None, :] != 0
+    # Distractores: divisores candidatos que NO dividen al número, elegidos al azar.
+    prioridad = np.where(no_divide, rng.random(no_divide.shape), 2.0)
+    distractores = divisores[np.argsort(prioridad, axis=1)[:, :NUM_OPCIONES - 1]]
+    opciones = np.column_stack([d, distractores]).astype(str)
+    preguntas = [f"¿Cuál de estos números divide exactamente a {n}?" for n in numero]
+    explicaciones = [f"{n} ÷ {a} = {b}, sin residuo." for n, a, b in zip(numero, d, k)]
+    return preguntas, opciones, explicaciones, no_divide.sum(axis=1) >= NUM_OPCIONES - 1
+
+
+def _simplificar_fraccion(rng, cantidad, maximo=12):
+    p = rng.integers(1, maximo, cantidad)
+    q = rng.integers(2, maximo + 1, cantidad)
+    g = rng.integers(2, 10, cantidad)
+    opciones = np.column_stack([
+        np.char.add(np.char.add(p.astype(str), "/"), q.astype(str)),
+        np.char.add(np.char.add(q.astype(str), "/"), p.astype(str)),
+        np.char.add(np.char.add((p * g).astype(str), "/"), q.astype(str)),
+    ])
+    preguntas = [f"Simplifica la fracción {a}/{b}:" for a, b in zip(p * g, q * g)]
+    explicaciones = [
+        f"Dividimos numerador y denominador entre {c}: {a * c} ÷ {c} = {a} y {b * c} ÷ {c} = {b}."
+        for a, b, c in zip(p, q, g)
+    ]
+    return preguntas, opciones, explicaciones, (p < q) & (np.gcd(p, q) == 1)
+
+
+def _porcentaje(rng, cantidad, maximo=1000):
+    p = rng.choice(np.array([5, 10, 15, 20, 25, 30, 40, 50, 60, 75]), cantidad)
+    x = 20 * rng.integers(1, maximo // 20 + 1, cantidad)
+    resultado = p * x // 100
+    opciones = np.column_stack([resultado, p * x // 10, resultado + p]).astype(str)
+    preguntas = [f"Calcula el {a}% de {b}:" for a, b in zip(p, x)]
+    explicaciones = [f"{b} × {a} ÷ 100 = {r}." for a, b, r in zip(p, x, resultado)]
+    return preguntas, opciones, explicaciones, np.ones(cantidad, dtype=bool)
+
+
+def _ecuacion_lineal(rng, cantidad, maximo=12):
+    a = rng.integers(2, 10, cantidad)
+    x = rng.integers(-maximo, maximo + 1, cantidad)
+    b = rng.integers(-20, 21, cantidad)
+    c = a * x + b
+    opciones = np.column_stack([x, -x, x + 1]).astype(str)
+    signo = np.where(b < 0, "-", "+")
+    preguntas = [f"Resuelve: {ai}x {s} {abs(bi)} = {ci}" for ai, s, bi, ci in zip(a, signo, b, c)]
+    explicaciones = [
+        f"{ai}x = {ci} {'+' if bi < 0 else '-'} {abs(bi)} = {ci - bi}; x = {ci - bi} ÷ {ai} = {xi}."
+        for ai, bi, ci, xi in zip(a, b, c, x)
+    ]
+    return preguntas, opciones, explicaciones, (x != 0) & (b != 0)
+
+
+GENERADORES = {
+    "divisibilidad": _divisibilidad,
+    "simplificar_fraccion": _simplificar_fraccion,
+    "porcentaje": _porcentaje,
+    "ecuacion_lineal": _ecuacion_lineal,
+}
+
+# Versión de cada generador: se sube a mano cuando un cambio produce un banco
+# distinto con la misma semilla (otros números, otro orden, otras opciones).
+# Entra en el id de sus preguntas (contenido.id_pregunta), y con él en la huella
+# que se guarda con cada intento: los intentos con el banco anterior ya no se
+# recalifican ni se analizan contra el nuevo. Un cambio que no altera el banco
+# (un comentario, una optimización) no la cambia.
+VERSIONES_GENERADORES = {
+    "divisibilidad": 1,
+    "simplificar_fraccion": 1,
+    "porcentaje": 1,
+    "ecuacion_lineal": 1,
+}
+
+
+# ==========================================
+# 2. BANCO DE VARIANTES
+# ==========================================
+def generar_banco(nombre, semilla, parametros=None, tamano=TAMANO_BANCO):
+    """Banco determinista de variantes de un generador.
+
+    Devuelve un dict con 'preguntas', 'opciones', 'explicaciones' (listas, una
+    entrada por variante) y 'claves' (np.int8 con el índice de la correcta).
+    Lanza KeyError si el generador no existe y ValueError si los parámetros no
+    alcanzan para llenar el banco.
+    """
+    generador = GENERADORES[nombre]
+    # El nombre entra en la semilla: dos generadores con la misma semilla no se parecen.
+    rng = np.random.default_rng([semilla, zlib.crc32(nombre.encode())])
+    # Se genera de más y se descartan filas inválidas o con opciones repetidas.
+    preguntas, opciones, explicaciones, validas = generador(rng, 4 * tamano, **(parametros or {}))
+    distintas = np.ones(len(opciones), dtype=bool)
+    for i in range(NUM_OPCIONES):
+        for j in range(i + 1, NUM_OPCIONES):
+            distintas &= opciones[:, i] != opciones[:, j]
+    # También se descartan preguntas repetidas dentro del banco.
+    _, primeras = np.unique(np.array(preguntas), return_index=True)
+    unicas = np.zeros(len(preguntas), dtype=bool)
+    unicas[primeras] = True
+    filas = np.flatnonzero(validas & distintas & unicas)[:tamano]
+    if len(filas) < tamano:
+        raise ValueError(f"los parámetros de '{nombre}' no alcanzan para {tamano} variantes distintas")
+    # La correcta se coloca en una posición al azar en cada variante.
+    orden = np.argsort(rng.random((tamano, NUM_OPCIONES)), axis=1)
+    mezcladas = np.take_along_axis(opciones[filas], orden, axis=1)
+    return {
+        "preguntas": [preguntas[i] for i in filas],
+        "opciones": mezcladas.tolist(),
+        "explicaciones": [explicaciones[i] for i in filas],
+        "claves": np.argmax(orden == 0, axis=1).astype(np.int8),
+    }
+
@@ -0,0 +1,418 @@
+"""Prueba de carga: muchos alumnos entrando y trabajando al mismo tiempo.
+
+Simula N alumnos que, todos a la vez, ingresan con `autenticar_usuario`, cargan
+su tablero (sesiones hechas), responden una sesión y la guardan con
+`guardar_progreso_sesion`. Todo corre en este proceso contra un Google Sheets
+simulado (la API de gspread que usa almacenamiento.py) con latencia
+configurable y errores 429 inyectados, así que no gasta cuota real.
+
+Por escenario reporta latencias p50/p95/p99 de cada paso, rendimiento, errores
+y llamadas a la API. Uso:
+
+    python prueba_carga.py --alumnos 50 200 --latencia-ms 150 --prob-429 0 0.05
+"""
+import argparse
+import itertools
+import logging
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from collections import Counter
+
+import gspread
+import numpy as np
+import pandas as pd
+from gspread.utils import a1_to_rowcol
+
+from almacenamiento import (
+    COLUMNAS_PROGRESO,
+    COLUMNAS_USUARIOS,
+    CUOTA_ESCRITURAS_POR_MINUTO,
+    CUOTA_LECTURAS_POR_MINUTO,
+    AlmacenSheets,
+    ConexionSheets,
+)
+from calificacion import calificar, claves_de_variantes, codificar_respuestas
+from contenido import CONTENIDO_CURSO, sortear_variantes, variante
+from credenciales import HILOS_VERIFICACION, MAX_VERIFICACIONES_EN_COLA, VerificadorCredenciales, cifrar
+
+# ==========================================
+# 1. GOOGLE SHEETS SIMULADO
+# ==========================================
+class RespuestaSimulada:
+    """Lo mínimo de requests.Response que necesita gspread.exceptions.APIError."""
+
+    def __init__(self, codigo, mensaje):
+        self.status_code = codigo
+        self.text = mensaje
+
+    def json(self):
+        return {"error": {"code": self.status_code, "message": self.text, "status": "RESOURCE_EXHAUSTED"}}
+
+
+class ApiSimulada:
+    """Latencia, errores 429 y conteo de llamadas compartidos por todas las hojas."""
+
+    def __init__(self, latencia=0.15, variacion=0.05, prob_429=0.0, semilla=0):
+        self.latencia = latencia
+        self.variacion = variacion
+        self.prob_429 = prob_429
+        self._rng = random.Random(semilla)
+        self._lock = threading.Lock()
+        self.llamadas = Counter()
+        self.errores_429 = 0
+
+    def llamar(self, metodo):
+        """Cuenta la llamada, espera la latencia y a veces responde 429."""
+        with self._lock:
+            self.llamadas[metodo] += 1
+            espera = max(0.0, self._rng.gauss(self.latencia, self.variacion))
+            falla = self._rng.random() < self.prob_429
+            if falla:
+                self.errores_429 += 1
+        time.sleep(espera)
+        if falla:
+            raise gspread.exceptions.APIError(RespuestaSimulada(429, "Quota exceeded (simulado)"))
+
+
+def _rango(rango):
+    """'A2:F' -> (fila_inicio, col_inicio, fila_fin o None, col_fin), base 1."""
+    inicio, _, fin = rango.partition(":")
+    fila, col = a1_to_rowcol(inicio)
+    if not fin:
+        return fila, col, fila, col
+    m = re.fullmatch(r"([A-Z]+)(\d*)", fin)
+    _, col_fin = a1_to_rowcol(m.group(1) + "1")
+    return fila, col, int(m.group(2)) if m.group(2) else None, col_fin
+
+
+class HojaSimulada:
+    """Una hoja en memoria con los métodos de gspread.Worksheet que usa la app."""
+
+    def __init__(self, api, titulo, encabezado):
+        self._api = api
+        self.title = titulo
+        self._filas = [list(encabezado)]
+        self._lock = threading.Lock()
+
+    def agregar_local(self, filas):
+        """Carga datos iniciales sin pasar por la API (no cuenta como llamada)."""
+        self._filas.extend([list(f) for f in filas])
+
+    def get_all_records(self):
+        self._api.llamar("get_all_records")
+        with self._lock:
+            encabezado = self._filas[0]
+            return [dict(zip(encabezado, f + [""] * (len(encabezado) - len(f)))) for f in self._filas[1:]]
+
+    def get(self, rango, **kwargs):
+        self._api.llamar("get")
+        fila, col, fila_fin, col_fin = _rango(rango)
+        with self._lock:
+            filas = self._filas[fila - 1:fila_fin]
+            return [[str(v) for v in f[col - 1:col_fin]] for f in filas]
+
+    def row_values(self, fila):
+        self._api.llamar("row_values")
+        with self._lock:
+            return list(self._filas[fila - 1]) if fila <= len(self._filas) else []
+
+    def find(self, valor, in_column=None, **kwargs):
+        self._api.llamar("find")
+        with self._lock:
+            for numero, f in enumerate(self._filas, start=1):
+                for col, celda in enumerate(f, start=1):
+                    if (in_column is None or col == in_column) and str(celda) == valor:
+                        return gspread.cell.Cell(numero, col, str(celda))
+        return None
+
+    def batch_get(self, rangos, **kwargs):
+        self._api.llamar("batch_get")
+        resultado = []
+        with self._lock:
+            for rango in rangos:
+                fila, col, fila_fin, col_fin = _rango(rango)
+                resultado.append([[str(v) for v in f[col - 1:col_fin]] for f in self._filas[fila - 1:fila_fin]])
+        return resultado
+
+    def append_row(self, fila, **kwargs):
+        self._api.llamar("append_row")
+        with self._lock:
+            self._filas.append(list(fila))
+
+    def append_rows(self, filas, **kwargs):
+        self._api.llamar("append_rows")
+        with self._lock:
+            self._filas.extend([list(f) for f in filas])
+
+    def _escribir(self, fila, col, valor):
+        while len(self._filas) < fila:
+            self._filas.append([])
+        renglon = self._filas[fila - 1]
+        renglon.extend([""] * (col - len(renglon)))
+        renglon[col - 1] = valor
+
+    def update(self, range_name=None, values=None, **kwargs):
+        self._api.llamar("update")
+        fila, col = a1_to_rowcol(range_name.partition(":")[0])
+        with self._lock:
+            for i, renglon in enumerate(values):
+                for j, valor in enumerate(renglon):
+                    self._escribir(fila + i, col + j, valor)
+
+    def update_cell(self, fila, col, valor):
+        self._api.llamar("update_cell")
+        with self._lock:
+            self._escribir(fila, col, valor)
+
+    def batch_update(self, datos, **kwargs):
+        self._api.llamar("batch_update")
+        with self._lock:
+            for dato in datos:
+                fila, col = a1_to_rowcol(dato["range"].partition(":")[0])
+                self._escribir(fila, col, dato["values"][0][0])
+
+
+class LibroSimulado:
+    def __init__(self, api):
+        self._api = api
+        self.id = "libro-simulado"
+        self.hojas = {
+            "Usuarios": HojaSimulada(api, "Usuarios", COLUMNAS_USUARIOS),
+            "Progreso": HojaSimulada(api, "Progreso", COLUMNAS_PROGRESO),
+        }
+
+    def worksheets(self):
+        self._api.llamar("worksheets")
+        return list(self.hojas.values())
+
+    def worksheet(self, nombre):
+        self._api.llamar("worksheet")
+        return self.hojas[nombre]
+
+
+class ClienteSimulado:
+    def __init__(self, libro):
+        self._libro = libro
+
+    def open(self, nombre):
+        return self._libro
+
+    def open_by_key(self, clave):
+        return self._libro
+
+
+# ==========================================
+# 2. ALUMNO SIMULADO
+# ==========================================
+PASSWORD_PRUEBA = "clave-de-prueba"
+PASOS = ["ingreso", "tablero", "guardar", "total"]
+
+
+class AvisosPorHilo:
+    """Toma el lugar de `st` dentro de app y guarda el último aviso de cada hilo.
+
+    autenticar_usuario y obtener_sesiones_completadas devuelven None por motivos
+    distintos (sin conexión, Sheets saturado, cola de verificación llena,
+    contraseña incorrecta) y solo los distinguen por el st.error/st.warning que
+    muestran. Aquí ese mensaje se conserva para clasificar el error.
+    """
+
+    def __init__(self, st):
+        self._st = st
+        self._local = threading.local()
+
+    def __getattr__(self, nombre):
+        return getattr(self._st, nombre)
+
+    def error(self, mensaje, *args, **kwargs):
+        self._local.ultimo = str(mensaje)
+
+    warning = error
+
+    def tomar(self):
+        """Último aviso del hilo actual (None si no hubo) y lo olvida."""
+        mensaje = getattr(self._local, "ultimo", None)
+        self._local.ultimo = None
+        return mensaje
+
+
+class PasoFallido(Exception):
+    """Un paso del alumno no se completó; el mensaje es el motivo que se reporta."""
+
+
+def alumno_simulado(app, nombre, sesion_id, rng, barrera, resultados):
+    """Recorre ingreso, tablero y una sesión; anota la latencia de cada paso."""
+    tiempos = {}
+    barrera.wait()
+    inicio = time.perf_counter()
+    try:
+        t = time.perf_counter()
+        uid = app.autenticar_usuario(nombre, PASSWORD_PRUEBA)
+        tiempos["ingreso"] = time.perf_counter() - t
+        if uid is None:
+            # Sin aviso, autenticar_usuario no encontró al alumno o la contraseña no coincidió.
+            raise PasoFallido(f"ingreso: {app.st.tomar() or 'usuario no encontrado o contraseña incorrecta'}")
+        t = time.perf_counter()
+        if app.obtener_sesiones_completadas(uid) is None:
+            raise PasoFallido(f"tablero: {app.st.tomar() or 'no se pudo leer el avance'}")
+        tiempos["tablero"] = time.perf_counter() - t
+        # Responder la sesión es local: se elige al azar entre las opciones de cada variante.
+        sesion = CONTENIDO_CURSO[sesion_id]
+        variantes = sortear_variantes(sesion, rng)
+        elegidas = [
+            int(rng.integers(len(variante(ejercicio, v)["opciones"])))
+            for ejercicio, v in zip(sesion["ejercicios"], variantes)
+        ]
+        puntaje, _ = calificar(claves_de_variantes(sesion["claves_variantes"], variantes), elegidas)
+        t = time.perf_counter()
+        respuestas = codificar_respuestas(elegidas, variantes, sesion["huella"])
+        app.guardar_progreso_sesion(uid, sesion_id, int(puntaje), len(sesion["ejercicios"]), respuestas)
+        tiempos["guardar"] = time.perf_counter() - t
+        tiempos["total"] = time.perf_counter() - inicio
+        resultados.append((tiempos, None))
+    except PasoFallido as e:
+        resultados.append((tiempos, str(e)))
+    except Exception as e:
+        resultados.append((tiempos, f"{type(e).__name__}: {e}"))
+
+
+# ==========================================
+# 3. ESCENARIOS
+# ==========================================
+def preparar_almacen(api, alumnos, ruta_spool, cuota_lecturas, cuota_escrituras, costo):
+    """AlmacenSheets contra el libro simulado, con `alumnos` ya registrados."""
+    libro = LibroSimulado(api)
+    # Una sola contraseña cifrada para todos: cifrar miles tardaría minutos y no es lo que se mide.
+    cifrada = cifrar(PASSWORD_PRUEBA, costo)
+    libro.hojas["Usuarios"].agregar_local(
+        [i, f"ALUMNO {i}", "ESCUELA", f"G{i % 4}", "2025-01-01 00:00:00", cifrada] for i in range(1, alumnos + 1)
+    )
+    conexion = ConexionSheets(
+        lambda: None, "simulado", cuota_lecturas=cuota_lecturas, cuota_escrituras=cuota_escrituras,
+        autorizar=lambda credenciales: ClienteSimulado(libro),
+    )
+    return AlmacenSheets(conexion, ruta_spool=ruta_spool), libro
+
+
+def percentiles(valores):
+    if not valores:
+        return [float("nan")] * 3
+    return [round(float(v) * 1000, 1) for v in np.percentile(valores, [50, 95, 99])]
+
+
+def correr_escenario(app, alumnos, latencia, variacion, prob_429, hilos, costo, max_en_cola, cuota_lecturas,
+                     cuota_escrituras, semilla=0):
+    """Corre un escenario y devuelve un dict con sus métricas."""
+    api = ApiSimulada(latencia, variacion, prob_429, semilla)
+    with tempfile.TemporaryDirectory() as directorio:
+        almacen, libro = preparar_almacen(
+            api, alumnos, os.path.join(directorio, "spool.sqlite3"), cuota_lecturas, cuota_escrituras, costo
+        )
+        verificador = VerificadorCredenciales(hilos=hilos, costo=costo, max_en_cola=max_en_cola)
+        # La app obtiene almacén y verificador de st.cache_resource: aquí se le dan los de la prueba.
+        app.obtener_almacen = lambda: almacen
+        app.obtener_verificador = lambda: verificador
+        if not isinstance(app.st, AvisosPorHilo):
+            app.st = AvisosPorHilo(app.st)
+
+        sesiones = list(CONTENIDO_CURSO)
+        rng = np.random.default_rng(semilla)
+        barrera = threading.Barrier(alumnos)
+        resultados = []
+        hilos_alumnos = [
+            threading.Thread(
+                target=alumno_simulado,
+                args=(app, f"alumno {i}", sesiones[i % len(sesiones)], np.random.default_rng(rng.integers(2**32)),
+                      barrera, resultados),
+            )
+            for i in range(1, alumnos + 1)
+        ]
+        inicio = time.perf_counter()
+        for hilo in hilos_alumnos:
+            hilo.start()
+        for hilo in hilos_alumnos:
+            hilo.join()
+        duracion = time.perf_counter() - inicio
+        # Los intentos quedaron en el spool: se mide cuánto tarda en llegar todo a la hoja.
+        t = time.perf_counter()
+        almacen.escritor.vaciar()
+        vaciado = time.perf_counter() - t
+        escritos = len(libro.hojas["Progreso"]._filas) - 1
+        almacen.escritor.cerrar()
+        almacen.escritor_usuarios.cerrar()
+        almacen.escritor_passwords.cerrar()
+        verificador._grupo.shutdown(wait=False)
+
+    exitosos = [tiempos for tiempos, error in resultados if error is None]
+    errores = Counter(error for _, error in resultados if error is not None)
+    fila = {"alumnos": alumnos, "prob_429": prob_429, "latencia_ms": round(latencia * 1000)}
+    for paso in PASOS:
+        p50, p95, p99 = percentiles([t[paso] for t in exitosos])
+        fila.update({f"{paso}_p50": p50, f"{paso}_p95": p95, f"{paso}_p99": p99})
+    fila.update({
+        "exitosos": len(exitosos),
+        "errores": sum(errores.values()),
+        "alumnos_por_s": round(len(exitosos) / duracion, 1),
+        "duracion_s": round(duracion, 2),
+        "vaciado_s": round(vaciado, 2),
+        "intentos_en_hoja": escritos,
+        "llamadas_api": sum(api.llamadas.values()),
+        "429_inyectados": api.errores_429,
+        "detalle_llamadas": dict(api.llamadas),
+        "detalle_errores": dict(errores),
+    })
+    return fila
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga contra un Google Sheets simulado.")
+    parser.add_argument("--alumnos", type=int, nargs="+", default=[20, 100], help="alumnos simultáneos por escenario")
+    parser.add_argument("--latencia-ms", type=float, default=150, help="latencia media de cada llamada a la API")
+    parser.add_argument("--variacion-ms", type=float, default=50, help="desviación estándar de la latencia")
+    parser.add_argument("--prob-429", type=float, nargs="+", default=[0.0, 0.05], help="probabilidad de 429 por llamada")
+    parser.add_argument("--hilos-verificacion", type=int, default=HILOS_VERIFICACION)
+    parser.add_argument("--costo-scrypt", type=int, default=12, help="log2 de N (la app usa 14)")
+    parser.add_argument("--max-verificaciones", type=int, default=MAX_VERIFICACIONES_EN_COLA,
+                        help="ingresos que pueden esperar verificación a la vez")
+    parser.add_argument("--cuota-lecturas", type=int, default=CUOTA_LECTURAS_POR_MINUTO)
+    parser.add_argument("--cuota-escrituras", type=int, default=CUOTA_ESCRITURAS_POR_MINUTO)
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    import app
+
+    # Fuera de `streamlit run`, cada llamada a st.* desde un hilo avisa que no hay
+    # ScriptRunContext; esos avisos no aportan aquí.
+    logging.disable(logging.WARNING)
+
+    filas = []
+    for alumnos, prob_429 in itertools.product(args.alumnos, args.prob_429):
+        print(f"Escenario: {alumnos} alumnos, 429 con probabilidad {prob_429}...", flush=True)
+        filas.append(correr_escenario(
+            app, alumnos, args.latencia_ms / 1000, args.variacion_ms / 1000, prob_429, args.hilos_verificacion,
+            args.costo_scrypt, args.max_verificaciones, args.cuota_lecturas, args.cuota_escrituras, args.semilla,
+        ))
+    tabla = pd.DataFrame(filas)
+    columnas = ["alumnos", "prob_429", "exitosos", "errores", "alumnos_por_s", "llamadas_api", "429_inyectados"]
+    print()
+    print(tabla[columnas].to_string(index=False))
+    print()
+    print("Latencias en ms (p50 / p95 / p99):")
+    for fila in filas:
+        pasos = "  ".join(
+            f"{paso} {fila[f'{paso}_p50']}/{fila[f'{paso}_p95']}/{fila[f'{paso}_p99']}" for paso in PASOS
+        )
+        print(f"  {fila['alumnos']} alumnos, 429={fila['prob_429']}: {pasos}")
+        print(f"    duración {fila['duracion_s']} s, vaciado del spool {fila['vaciado_s']} s, "
+              f"intentos en la hoja {fila['intentos_en_hoja']}")
+        print(f"    llamadas: {fila['detalle_llamadas']}")
+        for motivo, cuantos in sorted(fila["detalle_errores"].items(), key=lambda par: -par[1]):
+            print(f"    error x{cuantos}: {motivo}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Repaso espaciado por pregunta (sistema Leitner), mantenido en memoria.
+
+Cada pregunta que un alumno ya respondió es una tarjeta en una caja: acertar la
+sube de caja y la aleja en el tiempo, fallar la regresa a la caja 0 (repasar
+hoy). El programador lee solo los intentos nuevos del almacén, en un hilo en
+segundo plano, y guarda por alumno una cola de prioridad con la fecha en que
+vence cada tarjeta. El modo "Repaso" solo consulta esa cola.
+
+Los repasos se registran en memoria: la fuente duradera son los intentos de las
+sesiones, a partir de los cuales se reconstruyen las cajas al reiniciar.
+"""
+import heapq
+import threading
+from datetime import datetime, timedelta
+
+from calificacion import calificar, claves_de_variantes, matriz_respuestas
+from contenido import ErrorContenido, variante
+
+# ==========================================
+# 1. CAJAS
+# ==========================================
+# Días hasta el siguiente repaso según la caja (la posición en la lista).
+INTERVALOS_CAJA_DIAS = [0, 1, 3, 7, 16, 35]
+FORMATO_FECHA = "%Y-%m-%d %H:%M:%S"
+INTERVALO_PROGRAMADOR_SEGUNDOS = 30
+LIMITE_REPASO = 10
+
+
+def siguiente_caja(caja, acerto):
+    return min(caja + 1, len(INTERVALOS_CAJA_DIAS) - 1) if acerto else 0
+
+
+# ==========================================
+# 2. PROGRAMADOR DE REPASOS
+# ==========================================
+class ProgramadorRepaso:
+    """Cajas y colas de repaso de todos los alumnos, actualizadas por incrementos."""
+
+    def __init__(self, almacen, catalogo, intervalo=INTERVALO_PROGRAMADOR_SEGUNDOS):
+        self._almacen = almacen
+        self._catalogo = catalogo
+        self._intervalo = intervalo
+        self._lock = threading.Lock()
+        self._marca = 0
+        # usuario_id -> {id de pregunta: (caja, vence, sesion_id)}
+        self._tarjetas = {}
+        # usuario_id -> heap de (vence, id de pregunta); las entradas viejas se descartan al leer
+        self._colas = {}
+        self._ultimo_error = None
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._bucle, name="programador-repaso", daemon=True)
+        self._hilo.start()
+
+    def _bucle(self):
+        while not self._detener.is_set():
+            try:
+                self.actualizar()
+                self._ultimo_error = None
+            except Exception as e:
+                # Se reintenta en el siguiente ciclo con las cajas que ya se tienen.
+                self._ultimo_error = str(e)
+            self._detener.wait(self._intervalo)
+
+    def _programar(self, usuario_id, pregunta, sesion_id, acerto, fecha):
+        tarjetas = self._tarjetas.setdefault(usuario_id, {})
+        caja = siguiente_caja(tarjetas[pregunta][0], acerto) if pregunta in tarjetas else (1 if acerto else 0)
+        vence = fecha + timedelta(days=INTERVALOS_CAJA_DIAS[caja])
+        tarjetas[pregunta] = (caja, vence, sesion_id)
+        cola = self._colas.setdefault(usuario_id, [])
+        heapq.heappush(cola, (vence, pregunta))
+        if len(cola) > 2 * len(tarjetas) + 16:
+            # Demasiadas entradas viejas: se reconstruye la cola con las vigentes.
+            cola[:] = [(v, p) for p, (_, v, _) in tarjetas.items()]
+            heapq.heapify(cola)
+
+    def _incorporar_sesion(self, sesion_id, registros):
+        try:
+            sesion = self._catalogo[sesion_id]
+        except (KeyError, ErrorContenido):
+            return
+        # Los intentos con la huella de otra versión de la sesión no se cuentan.
+        matriz, validas, variantes = matriz_respuestas(
+            [r['respuestas'] for r in registros], len(sesion['ids']), sesion['huella']
+        )
+        _, aciertos = calificar(claves_de_variantes(sesion['claves_variantes'], variantes), matriz)
+        for fila in validas.nonzero()[0]:
+            registro = registros[fila]
+            try:
+                usuario_id = int(registro['usuario_id'])
+                fecha = datetime.strptime(str(registro['fecha_intento']), FORMATO_FECHA)
+            except (TypeError, ValueError):
+                continue
+            for pregunta, acerto in zip(sesion['ids'], aciertos[fila].tolist()):
+                self._programar(usuario_id, pregunta, sesion_id, acerto, fecha)
+
+    def actualizar(self):
+        """Incorpora los intentos llegados desde la última llamada (en orden de llegada)."""
+        with self._lock:
+            registros, marca = self._almacen.intentos(self._marca)
+            por_sesion = {}
+            for registro in registros:
+                if registro.get('respuestas') not in (None, ''):
+                    por_sesion.setdefault(str(registro['sesion_id']), []).append(registro)
+            for sesion_id, lote in por_sesion.items():
+                self._incorporar_sesion(sesion_id, lote)
+            self._marca = marca
+
+    def registrar_repaso(self, usuario_id, resultados, ahora=None):
+        """Mueve de caja las tarjetas repasadas: `resultados` es [(id de pregunta, acertó)]."""
+        ahora = ahora or datetime.now()
+        with self._lock:
+            tarjetas = self._tarjetas.get(usuario_id, {})
+            for pregunta, acerto in resultados:
+                if pregunta in tarjetas:
+                    self._programar(usuario_id, pregunta, tarjetas[pregunta][2], acerto, ahora)
+
+    def pendientes(self, usuario_id, limite=LIMITE_REPASO, ahora=None):
+        """Preguntas vencidas del alumno, la más atrasada primero.
+
+        Cada una es un dict con 'id', 'sesion_id', 'caja', 'vence' y 'ejercicio'
+        (ya en la variante a mostrar). Las preguntas que ya no existen en el
+        contenido se omiten.
+        """
+        ahora = ahora or datetime.now()
+        with self._lock:
+            tarjetas = self._tarjetas.get(usuario_id, {})
+            cola = self._colas.get(usuario_id, [])
+            elegidas, revisadas, vistas = [], [], set()
+            while cola and cola[0][0] <= ahora and len(elegidas) < limite:
+                vence, pregunta = heapq.heappop(cola)
+                if tarjetas[pregunta][1] != vence or pregunta in vistas:
+                    continue  # entrada vieja: la tarjeta se reprogramó después
+                vistas.add(pregunta)
+                revisadas.append((vence, pregunta))
+                caja, _, sesion_id = tarjetas[pregunta]
+                ejercicio = self._ejercicio(sesion_id, pregunta, vence)
+                if ejercicio is not None:
+                    elegidas.append({'id': pregunta, 'sesion_id': sesion_id, 'caja': caja, 'vence': vence, 'ejercicio': ejercicio})
+            for entrada in revisadas:
+                heapq.heappush(cola, entrada)
+        return elegidas
+
+    def _ejercicio(self, sesion_id, pregunta, vence):
+        """Ejercicio a repasar; si es generado, una variante fija mientras no se reprograme."""
+        try:
+            sesion = self._catalogo[sesion_id]
+        except (KeyError, ErrorContenido):
+            return None
+        if pregunta not in sesion['ids']:
+            return None
+        indice = sesion['ids'].index(pregunta)
+        return variante(sesion['ejercicios'][indice], int(vence.timestamp()) % int(sesion['num_variantes'][indice]))
+
+    def resumen(self, usuario_id, ahora=None):
+        """Tarjetas del alumno y cuántas vencen hoy o antes."""
+        ahora = ahora or datetime.now()
+        with self._lock:
+            tarjetas = self._tarjetas.get(usuario_id, {})
+            return {
+                "tarjetas": len(tarjetas),
+                "vencidas": sum(1 for _, vence, _ in tarjetas.values() if vence <= ahora),
+            }
+
+    def cerrar(self):
+        self._detener.set()
@@ -0,0 +1,68 @@
+"""Asignación de ids y nombres para registros nuevos."""
+import threading
+
+import pytest
+
+from almacenamiento import AsignadorIds, UsuarioExistente
+
+
+class UsuariosEnMemoria:
+    """Lo que AsignadorIds usa de CacheUsuarios."""
+
+    def __init__(self, nombres):
+        self.por_nombre = {nombre: {"id": i} for i, nombre in enumerate(nombres, start=1)}
+
+    def buscar(self, nombre, recargar_si_falta=True):
+        return self.por_nombre.get(nombre)
+
+    def max_id(self):
+        return max((r["id"] for r in self.por_nombre.values()), default=0)
+
+
+def test_ids_consecutivos_tras_el_mayor():
+    asignador = AsignadorIds(UsuariosEnMemoria(["ANA", "BETO"]))
+    assert asignador.reservar("carla") == 3
+    assert asignador.reservar("DANIEL") == 4
+
+
+def test_nombre_registrado_o_reservado():
+    asignador = AsignadorIds(UsuariosEnMemoria(["ANA"]))
+    with pytest.raises(UsuarioExistente):
+        asignador.reservar(" ana ")
+    asignador.reservar("beto")
+    with pytest.raises(UsuarioExistente):
+        asignador.reservar("BETO")
+    asignador.liberar("beto")
+    assert asignador.reservar("BETO") == 3
+
+
+def test_reservar_varios():
+    asignador = AsignadorIds(UsuariosEnMemoria(["ANA"]))
+    asignador.reservar("beto")
+    nuevos, repetidos = asignador.reservar_varios(["carla", "ana", "Beto", "daniel", "CARLA"])
+    assert nuevos == [(3, "CARLA"), (4, "DANIEL")]
+    assert repetidos == ["ANA", "BETO", "CARLA"]
+    assert asignador.reservar("elena") == 5
+
+
+def test_reservas_simultaneas_no_repiten_ids():
+    asignador = AsignadorIds(UsuariosEnMemoria([]))
+    barrera = threading.Barrier(16)
+    ids, repetidos = [], []
+
+    def registrar(i):
+        barrera.wait()
+        for k in range(50):
+            try:
+                ids.append(asignador.reservar(f"alumno {k}-{i % 8}"))
+            except UsuarioExistente:
+                repetidos.append(k)
+
+    hilos = [threading.Thread(target=registrar, args=(i,)) for i in range(16)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    # 8 nombres distintos por vuelta: cada uno gana una sola vez.
+    assert sorted(ids) == list(range(1, 401))
+    assert len(repetidos) == 400
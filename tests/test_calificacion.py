@@ -0,0 +1,107 @@
+"""Formato compacto de respuestas: ida y vuelta, huella de contenido y lotes."""
+import numpy as np
+import pytest
+
+from calificacion import (
+    BYTES_HUELLA,
+    SIN_RESPUESTA,
+    codificar_lote,
+    codificar_respuestas,
+    decodificar_respuestas,
+    huella_contenido,
+    matriz_respuestas,
+)
+
+HUELLA = huella_contenido(["a1", "b2", "c3"])
+OTRA_HUELLA = huella_contenido(["a1", "c3", "b2"])
+
+
+@pytest.mark.parametrize("elegidas", [
+    [0, 1, 2],
+    [2, 0, 1, 0],
+    [SIN_RESPUESTA, 3, SIN_RESPUESTA],
+    [14] * 11,
+    [SIN_RESPUESTA] * 7,
+    [0],
+])
+@pytest.mark.parametrize("huella", [None, HUELLA])
+def test_ida_y_vuelta(elegidas, huella):
+    texto = codificar_respuestas(elegidas, huella=huella)
+    assert decodificar_respuestas(texto) == elegidas
+
+
+@pytest.mark.parametrize("huella", [None, HUELLA])
+def test_ida_y_vuelta_con_variantes(huella):
+    elegidas, variantes = [1, SIN_RESPUESTA, 0, 2, 1], [0, 255, 3, 0, 17]
+    texto = codificar_respuestas(elegidas, variantes, huella)
+    assert texto[0] == ("V" if huella else "v")
+    assert decodificar_respuestas(texto) == elegidas
+    matriz, validas, leidas = matriz_respuestas([texto], len(elegidas), huella)
+    assert validas.tolist() == [True]
+    assert matriz[0].tolist() == elegidas
+    assert leidas[0].tolist() == variantes
+
+
+def test_variantes_en_cero_usan_el_formato_sin_variantes():
+    assert codificar_respuestas([1, 0], [0, 0]) == codificar_respuestas([1, 0])
+
+
+def test_formato_anterior_separado_por_comas():
+    assert decodificar_respuestas("0,2,1") == [0, 2, 1]
+    assert decodificar_respuestas("  ") == []
+
+
+@pytest.mark.parametrize("elegidas, variantes", [
+    ([15], None),
+    ([0] * 256, None),
+    ([0, 1], [1, 256]),
+    ([0, 1], [1, -1]),
+    ([0, 1], [1]),
+])
+def test_fuera_de_rango(elegidas, variantes):
+    with pytest.raises(ValueError):
+        codificar_respuestas(elegidas, variantes)
+
+
+def test_huella_de_tamano_incorrecto():
+    with pytest.raises(ValueError):
+        codificar_respuestas([0, 1], huella=b"\x00" * (BYTES_HUELLA + 1))
+
+
+@pytest.mark.parametrize("texto", ["n", "n!!!", "nAAAA", "vCgARAQAQ", "1,x"])
+def test_texto_danado(texto):
+    with pytest.raises(ValueError):
+        decodificar_respuestas(texto)
+
+
+def test_matriz_descarta_intentos_de_otra_version():
+    textos = [
+        codificar_respuestas([0, 1, 2], huella=HUELLA),
+        codificar_respuestas([0, 1, 2], huella=OTRA_HUELLA),
+        codificar_respuestas([0, 1, 2]),
+        "0,1,2",
+        codificar_respuestas([0, 1], huella=HUELLA),
+        "",
+        "n!!",
+    ]
+    _, validas, _ = matriz_respuestas(textos, 3, HUELLA)
+    assert validas.tolist() == [True, False, True, True, False, False, False]
+    _, validas, _ = matriz_respuestas(textos, 3, HUELLA, exigir_huella=True)
+    assert validas.tolist() == [True, False, False, False, False, False, False]
+
+
+def test_lote_igual_a_uno_por_uno():
+    rng = np.random.default_rng(0)
+    matriz = rng.integers(-1, 4, size=(20, 9))
+    for huella in (None, HUELLA):
+        esperado = [codificar_respuestas(fila, huella=huella) for fila in matriz]
+        assert codificar_lote(matriz, huella) == esperado
+        decodificada, validas, _ = matriz_respuestas(esperado, 9, huella)
+        assert validas.all()
+        assert (decodificada == matriz).all()
+
+
+def test_huella_depende_del_orden_de_las_preguntas():
+    assert len(HUELLA) == BYTES_HUELLA
+    assert HUELLA != OTRA_HUELLA
+    assert HUELLA == huella_contenido(["a1", "b2", "c3"])
@@ -0,0 +1,75 @@
+"""Contraseñas cifradas y tokens de sesión firmados."""
+import pytest
+
+from credenciales import FirmadorSesiones, _b64, _desde_b64, cifrar, verificar
+
+# Costo bajo para que las pruebas no tarden: el formato es el mismo.
+COSTO = 4
+
+
+def test_cifrar_y_verificar():
+    guardado = cifrar("clave", COSTO)
+    assert guardado.startswith("scrypt$")
+    assert verificar("clave", guardado, COSTO) == (True, False)
+    assert verificar("otra", guardado, COSTO) == (False, False)
+
+
+def test_texto_plano_y_costo_anterior_piden_recifrar():
+    assert verificar("clave", "clave", COSTO) == (True, True)
+    assert verificar("otra", "clave", COSTO) == (False, False)
+    assert verificar("clave", cifrar("clave", COSTO), COSTO + 1) == (True, True)
+
+
+@pytest.fixture
+def firmador():
+    return FirmadorSesiones("clave-de-prueba", horas=1)
+
+
+def test_token_ida_y_vuelta(firmador):
+    token = firmador.emitir(7, "ÑANDÚ PÉREZ", ahora=1000)
+    assert firmador.validar(token, ahora=1001) == {"usuario_id": 7, "nombre": "ÑANDÚ PÉREZ", "vence": 4600}
+
+
+def test_token_vencido(firmador):
+    token = firmador.emitir(7, "ANA", ahora=1000)
+    assert firmador.validar(token, ahora=4599) is not None
+    assert firmador.validar(token, ahora=4600) is None
+
+
+def test_token_alterado(firmador):
+    token = firmador.emitir(7, "ANA", ahora=1000)
+    datos, firma = token.split(".")
+    # Otro alumno con la firma original.
+    otros = _desde_b64(datos).replace(b'"u":7', b'"u":8')
+    assert firmador.validar(_b64(otros) + "." + firma, ahora=1001) is None
+    # Vencimiento extendido con la firma original.
+    extendido = _desde_b64(datos).replace(b"4600", b"9600")
+    assert firmador.validar(_b64(extendido) + "." + firma, ahora=1001) is None
+    # Firma cambiada.
+    assert firmador.validar(datos + "." + firma[:-2] + "AA", ahora=1001) is None
+
+
+@pytest.mark.parametrize("token", ["", "x", "x.y", "...", "a.b.c", None, "%%%.%%%"])
+def test_token_mal_formado(firmador, token):
+    assert firmador.validar(token, ahora=0) is None
+
+
+def test_token_de_otra_clave(firmador):
+    token = FirmadorSesiones("otra-clave", horas=1).emitir(7, "ANA", ahora=1000)
+    assert firmador.validar(token, ahora=1001) is None
+
+
+def test_token_revocado_al_cerrar_sesion(firmador):
+    viejo = firmador.emitir(7, "ANA", ahora=1000)
+    de_otro = firmador.emitir(8, "BETO", ahora=1000)
+    firmador.revocar(7)
+    assert firmador.validar(viejo, ahora=1001) is None
+    assert firmador.validar(de_otro, ahora=1001) is not None
+    nuevo = firmador.emitir(7, "ANA", ahora=1002)
+    assert firmador.validar(nuevo, ahora=1003) is not None
+
+
+def test_por_renovar(firmador):
+    sesion = firmador.validar(firmador.emitir(7, "ANA", ahora=0), ahora=0)
+    assert not firmador.por_renovar(sesion, ahora=1700)
+    assert firmador.por_renovar(sesion, ahora=1900)